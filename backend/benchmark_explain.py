@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mide el costo extra de las explicaciones (explain=True) frente a la
+inferencia normal de /api/analyze sobre un corpus. Uso:
+
+    python benchmark_explain.py [sample_offers.csv] [--repeat 3]
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from compare_lemmatizers import load_corpus
+from explainability import EXPLAIN_METHODS
+from gender_bias_analyzer import AdvancedBiasAnalyzer
+
+
+def _time_ms(fn, texts, repeat: int):
+    """Latencia por oferta (ms) de fn sobre todos los textos, repetido `repeat` veces."""
+    samples = []
+    for _ in range(repeat):
+        for text in texts:
+            start = time.perf_counter()
+            fn(text)
+            samples.append(1000 * (time.perf_counter() - start))
+    samples.sort()
+    return {
+        "mean_ms": round(statistics.mean(samples), 2),
+        "p50_ms": round(samples[len(samples) // 2], 2),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el costo de explain=True en el análisis")
+    parser.add_argument("corpus", nargs="?", default="sample_offers.csv")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    analyzer = AdvancedBiasAnalyzer()
+    if analyzer.classifier is None:
+        raise SystemExit("RoBERTa no está disponible: no hay nada que medir")
+    texts = load_corpus(args.corpus)
+
+    # Calentamiento (carga perezosa de pesos, cachés)
+    for method in EXPLAIN_METHODS:
+        analyzer.analyze(texts[0], explain=True, explain_method=method)
+
+    report = {"documents": len(texts), "plain": _time_ms(analyzer.analyze, texts, args.repeat)}
+    for method in EXPLAIN_METHODS:
+        stats = _time_ms(lambda t: analyzer.analyze(t, explain=True, explain_method=method), texts, args.repeat)
+        stats["overhead"] = round(stats["mean_ms"] / report["plain"]["mean_ms"], 2)
+        report[method] = stats
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
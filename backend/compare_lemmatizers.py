@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compara el lematizador rápido (lookup) con el pipeline spaCy completo.
+
+Para cada oferta del corpus calcula los lemas, el análisis léxico y la
+detección TIC con ambos modos y reporta el grado de acuerdo, el tiempo por
+documento y la memoria que ocupa cada pipeline. Uso:
+
+    python compare_lemmatizers.py [sample_offers.csv] [--output reporte.json]
+"""
+
+import argparse
+import csv
+import json
+import time
+import tracemalloc
+from typing import Dict, List
+
+from gender_bias_analyzer import AdvancedBiasAnalyzer
+
+
+def load_corpus(path: str) -> List[str]:
+    """Lee un corpus CSV (columnas 'title' y 'description') o de texto plano (una oferta por línea)."""
+    if path.endswith(".csv"):
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.DictReader(f))
+        # Igual que analyze_job en roberta.py: título y descripción juntos
+        return [
+            f"{row['title']}. {row.get('description') or ''}" if row.get("title") else row.get("description") or ""
+            for row in rows
+        ]
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def _build_analyzer(mode: str):
+    """Crea un analizador solo léxico y mide la memoria reservada al cargarlo."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    analyzer = AdvancedBiasAnalyzer(lemmatizer_mode=mode, use_roberta=False)
+    load_seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return analyzer, load_seconds, peak / 1024 ** 2
+
+
+def _run(analyzer: AdvancedBiasAnalyzer, texts: List[str]):
+    """Lematiza y analiza cada texto; devuelve resultados y segundos totales."""
+    results = []
+    start = time.perf_counter()
+    for text in texts:
+        lemmas = set(analyzer._lemmatize(text))
+        masc_hits, fem_hits, lex_score, detected = analyzer._lexical_analysis(text, lemmas)
+        results.append({
+            "lemmas": lemmas,
+            "lex_score": lex_score,
+            "detected": {k: set(v) for k, v in detected.items()},
+            "is_tic": analyzer.is_tic_offer(text, lemmas=lemmas),
+        })
+    return results, time.perf_counter() - start
+
+
+def compare(texts: List[str]) -> Dict:
+    """Ejecuta ambos modos sobre el corpus y calcula las métricas de acuerdo."""
+    report = {"documents": len(texts), "modes": {}}
+    runs = {}
+    for mode in ("full", "fast"):
+        analyzer, load_seconds, load_mb = _build_analyzer(mode)
+        if analyzer.lemmatizer_mode != mode:
+            raise RuntimeError(f"No se pudo cargar el modo {mode!r}")
+        results, seconds = _run(analyzer, texts)
+        runs[mode] = results
+        report["modes"][mode] = {
+            "pipeline": analyzer.nlp.pipe_names,
+            "load_seconds": round(load_seconds, 3),
+            "load_memory_mb": round(load_mb, 1),
+            "total_seconds": round(seconds, 4),
+            "ms_per_doc": round(1000 * seconds / max(len(texts), 1), 3),
+        }
+
+    full, fast = runs["full"], runs["fast"]
+    jaccard = [
+        len(a["lemmas"] & b["lemmas"]) / len(a["lemmas"] | b["lemmas"]) if a["lemmas"] | b["lemmas"] else 1.0
+        for a, b in zip(full, fast)
+    ]
+    n = max(len(texts), 1)
+    report["agreement"] = {
+        "lemma_jaccard_mean": round(sum(jaccard) / n, 4),
+        "detected_terms_exact": round(sum(a["detected"] == b["detected"] for a, b in zip(full, fast)) / n, 4),
+        "lex_score_exact": round(sum(a["lex_score"] == b["lex_score"] for a, b in zip(full, fast)) / n, 4),
+        "lex_score_mae": round(sum(abs(a["lex_score"] - b["lex_score"]) for a, b in zip(full, fast)) / n, 4),
+        "is_tic_exact": round(sum(a["is_tic"] == b["is_tic"] for a, b in zip(full, fast)) / n, 4),
+    }
+    report["speedup"] = round(
+        report["modes"]["full"]["total_seconds"] / max(report["modes"]["fast"]["total_seconds"], 1e-9), 1
+    )
+
+    # Términos del léxico que solo detecta uno de los dos modos
+    missed, extra = set(), set()
+    for a, b in zip(full, fast):
+        for category in a["detected"]:
+            missed |= a["detected"][category] - b["detected"][category]
+            extra |= b["detected"][category] - a["detected"][category]
+    report["terms_only_full"] = sorted(missed)
+    report["terms_only_fast"] = sorted(extra)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara los modos de lematización full y fast")
+    parser.add_argument("corpus", nargs="?", default="sample_offers.csv",
+                        help="CSV con columna 'description' o archivo de texto (una oferta por línea)")
+    parser.add_argument("-o", "--output", help="Ruta opcional para guardar el reporte en JSON")
+    args = parser.parse_args()
+
+    report = compare(load_corpus(args.corpus))
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
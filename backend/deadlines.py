@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Plazos por petición y control de admisión al modelo contextual.
+
+Cada petición del API recibe un plazo (Deadline). Antes de la etapa
+contextual el analizador consulta a la InferenceGate del worker, que limita
+cuántas inferencias se ejecutan a la vez y cuántas esperan turno, y estima
+la duración de la inferencia a partir de las anteriores. Si la cola está
+llena, si la espera más la inferencia no caben en el plazo restante, o si el
+cliente se ha desconectado, la oferta se resuelve solo con el léxico
+(method_used="lexical_degraded"). Así la latencia de cola queda acotada en
+picos de tráfico en lugar de acumularse peticiones detrás del modelo.
+
+Variables de entorno (ver DeadlineConfig.from_env):
+    REQUEST_DEADLINE_MS      Plazo de /api/analyze (0 = sin plazo)
+    BATCH_DEADLINE_MS        Plazo de /api/analyze/batch (0 = sin plazo)
+    INFERENCE_CONCURRENCY    Inferencias simultáneas por worker
+    INFERENCE_MAX_QUEUE      Peticiones que pueden esperar al modelo
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+import logging
+logger = logging.getLogger(__name__)
+
+DEGRADED_METHOD = "lexical_degraded"
+
+T = TypeVar("T")
+
+
+@dataclass
+class DeadlineConfig:
+    """Plazos del API y límites de la cola de inferencia de cada worker."""
+    analyze_ms: float = 3000
+    batch_ms: float = 30000
+    max_concurrency: int = 1   # torch ya usa todos los hilos del worker en cada inferencia
+    max_queue: int = 8
+
+    @classmethod
+    def from_env(cls) -> "DeadlineConfig":
+        """Lee la configuración de las variables de entorno del módulo."""
+        return cls(
+            analyze_ms=float(os.getenv("REQUEST_DEADLINE_MS", cls.analyze_ms)),
+            batch_ms=float(os.getenv("BATCH_DEADLINE_MS", cls.batch_ms)),
+            max_concurrency=max(1, int(os.getenv("INFERENCE_CONCURRENCY", cls.max_concurrency))),
+            max_queue=max(0, int(os.getenv("INFERENCE_MAX_QUEUE", cls.max_queue))),
+        )
+
+
+class Deadline:
+    """Plazo de una petición; cancel() lo agota de inmediato (cliente desconectado)."""
+
+    def __init__(self, timeout_ms: Optional[float] = None):
+        self.expires_at = time.monotonic() + timeout_ms / 1000 if timeout_ms else None
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def remaining(self) -> float:
+        """Segundos que quedan (infinito si no hay plazo, 0 si se canceló)."""
+        if self.cancelled:
+            return 0.0
+        if self.expires_at is None:
+            return float("inf")
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def allows(self, seconds: float) -> bool:
+        """Indica si aún caben `seconds` de trabajo en el plazo."""
+        return not self.cancelled and self.remaining() > seconds
+
+
+class InferenceGate:
+    """
+    Semáforo con cola FIFO acotada alrededor del modelo contextual, con una
+    estimación (media móvil exponencial) de los segundos por texto. Las
+    llamadas exclusivas (explicaciones, mucho más lentas que una predicción)
+    llevan su propia estimación para no inflar la de las predicciones.
+
+    Sin plazo (procesos por lotes, scripts) se espera turno sin límite y
+    nunca se rechaza; solo las peticiones con Deadline pueden degradarse.
+    """
+
+    def __init__(self, max_concurrency: int = 1, max_queue: int = 8, smoothing: float = 0.2):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.smoothing = smoothing
+        self.seconds_per_text = 0.0
+        self.seconds_per_exclusive = 0.0
+        self.admitted = 0
+        self.rejected = 0
+        self._active = 0
+        # Esperas en orden de llegada: al liberar, el turno pasa a la más antigua
+        self._queue: Deque[Tuple[threading.Event, int]] = deque()
+        self._lock = threading.Lock()
+
+    def estimate(self, n_texts: int, exclusive: bool = False) -> float:
+        """Segundos estimados para procesar `n_texts` textos (0 hasta la primera medición)."""
+        return (self.seconds_per_exclusive if exclusive else self.seconds_per_text) * n_texts
+
+    def run(self, fn: Callable[[], T], n_texts: int = 1, deadline: Optional[Deadline] = None,
+            exclusive: bool = False) -> Optional[T]:
+        """
+        Ejecuta fn() cuando hay turno y hay tiempo para ello.
+
+        Args:
+            exclusive: Ocupar todos los turnos (nada más se ejecuta en el
+                modelo a la vez), para llamadas que modifican el modelo compartido
+
+        Returns:
+            El resultado de fn(), o None si la petición no se admitió (cola
+            llena, plazo insuficiente o cancelada)
+        """
+        if not self._admit(n_texts, deadline, exclusive):
+            return None
+        start = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            self._release(n_texts, time.perf_counter() - start, exclusive)
+
+    def _slots(self, exclusive: bool) -> int:
+        return self.max_concurrency if exclusive else 1
+
+    def _admit(self, n_texts: int, deadline: Optional[Deadline], exclusive: bool) -> bool:
+        slots = self._slots(exclusive)
+        with self._lock:
+            if deadline is not None and (len(self._queue) >= self.max_queue and self._active >= self.max_concurrency
+                                         or not deadline.allows(self.estimate(n_texts, exclusive))):
+                self.rejected += 1
+                return False
+            if not self._queue and self._active + slots <= self.max_concurrency:
+                self._active += slots
+                self.admitted += 1
+                return True
+            turn = threading.Event()
+            self._queue.append((turn, slots))
+
+        while not turn.is_set():
+            if deadline is None:
+                turn.wait()
+                continue
+            # Espera en tramos cortos para notar la cancelación del cliente
+            slack = deadline.remaining() - self.estimate(n_texts, exclusive)
+            if slack <= 0:
+                with self._lock:
+                    if turn.is_set():
+                        # El turno llegó justo ahora: se devuelve para los siguientes
+                        self._active -= slots
+                    else:
+                        self._queue.remove((turn, slots))
+                    self._dispatch()
+                    self.rejected += 1
+                return False
+            turn.wait(min(slack, 0.05))
+        with self._lock:
+            self.admitted += 1
+        return True
+
+    def _dispatch(self):
+        """Da turno, por orden de llegada, a las esperas que caben en los turnos libres (con el lock tomado)."""
+        while self._queue and self._active + self._queue[0][1] <= self.max_concurrency:
+            turn, slots = self._queue.popleft()
+            self._active += slots
+            turn.set()
+
+    def _release(self, n_texts: int, seconds: float, exclusive: bool):
+        attr = "seconds_per_exclusive" if exclusive else "seconds_per_text"
+        with self._lock:
+            per_text = seconds / max(1, n_texts)
+            previous = getattr(self, attr)
+            setattr(self, attr, previous + self.smoothing * (per_text - previous) if previous else per_text)
+            self._active -= self._slots(exclusive)
+            self._dispatch()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "waiting": len(self._queue),
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "ms_per_text": round(1000 * self.seconds_per_text, 2),
+                "ms_per_exclusive": round(1000 * self.seconds_per_exclusive, 2),
+            }
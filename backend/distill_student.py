@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Destilación de RoBERTa en un modelo estudiante ligero.
+
+El estudiante es una regresión lineal sobre n-gramas con hashing que aprende
+la probabilidad masculina asignada por RoBERTa (el profesor) a cada oferta.
+El corpus de entrenamiento son las ofertas ya puntuadas por roberta.py en
+fact_bias_assessment, o un CSV con columnas title, description, prob_m y prob_f.
+Solo cuentan los resultados en los que RoBERTa se ejecutó de verdad
+(method_used="ensemble", sin duplicate_of): los léxicos, de cascada o
+degradados llevan 0.5/0.5 de relleno y las copias de casi duplicados
+repetirían su oferta canónica.
+
+    python distill_student.py --db postgresql+psycopg2://... -o distilled_student.joblib
+    python distill_student.py --csv puntuaciones.csv --teacher-latency 50
+
+El modelo entrenado se usa con MODEL_VER=v2.1_distilled (ver gender_bias_analyzer.py).
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Junto al módulo, sea cual sea el directorio de trabajo (roberta.py se ejecuta desde la raíz)
+DEFAULT_STUDENT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "distilled_student.joblib")
+
+# Versión del modelo profesor cuyas puntuaciones se usan para entrenar
+TEACHER_MODEL_VER = "v2.0_ensemble"
+
+
+class DistilledClassifier:
+    """
+    Clasificador estudiante con la misma interfaz que el pipeline
+    text-classification de transformers: recibe un texto (o lista de textos) y
+    devuelve [{'label': 'LABEL_0' | 'LABEL_1', 'score': float}, ...],
+    donde LABEL_0 es masculino.
+    """
+
+    def __init__(self, vectorizer, regressor):
+        self.vectorizer = vectorizer
+        self.regressor = regressor
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_STUDENT_PATH) -> "DistilledClassifier":
+        """Carga un estudiante guardado con save()."""
+        import joblib
+        bundle = joblib.load(path)
+        return cls(bundle["vectorizer"], bundle["regressor"])
+
+    def save(self, path: str = DEFAULT_STUDENT_PATH):
+        """Guarda el vectorizador y el regresor en un único archivo joblib."""
+        import joblib
+        joblib.dump({"vectorizer": self.vectorizer, "regressor": self.regressor}, path)
+
+    def predict_prob_m(self, texts: List[str]) -> np.ndarray:
+        """Devuelve la probabilidad masculina estimada para cada texto."""
+        return np.clip(self.regressor.predict(self.vectorizer.transform(texts)), 0.0, 1.0)
+
+    def __call__(self, texts, **kwargs) -> List[Dict]:
+        if isinstance(texts, str):
+            texts = [texts]
+        return [
+            {"label": "LABEL_0", "score": float(p)} if p >= 0.5 else {"label": "LABEL_1", "score": float(1 - p)}
+            for p in self.predict_prob_m(texts)
+        ]
+
+
+def build_student() -> DistilledClassifier:
+    """Crea un estudiante sin entrenar: n-gramas de palabras y caracteres con hashing + Ridge."""
+    from sklearn.feature_extraction.text import HashingVectorizer
+    from sklearn.linear_model import Ridge
+    from sklearn.pipeline import FeatureUnion
+
+    vectorizer = FeatureUnion([
+        ("words", HashingVectorizer(analyzer="word", ngram_range=(1, 2), n_features=2 ** 18,
+                                    alternate_sign=False, norm="l2", lowercase=True)),
+        ("chars", HashingVectorizer(analyzer="char_wb", ngram_range=(3, 5), n_features=2 ** 18,
+                                    alternate_sign=False, norm="l2", lowercase=True)),
+    ])
+    return DistilledClassifier(vectorizer, Ridge(alpha=1.0))
+
+
+def load_teacher_corpus_from_db(db_url: str, model_ver: str = TEACHER_MODEL_VER) -> Tuple[List[str], List[float]]:
+    """Lee las ofertas y las probabilidades del profesor desde PostgreSQL."""
+    from sqlalchemy import create_engine, text
+
+    query = text("""
+        SELECT j.title, j.description, b.prob_m, b.prob_f
+        FROM fact_bias_assessment b
+        JOIN fact_job_post j ON j.job_id = b.job_id
+        WHERE b.model_ver = :model_ver
+          AND b.method_used = 'ensemble'
+          AND b.duplicate_of IS NULL
+    """)
+    with create_engine(db_url).connect() as conn:
+        rows = conn.execute(query, {"model_ver": model_ver}).mappings().all()
+    return _to_examples(rows)
+
+
+def load_teacher_corpus_from_csv(path: str) -> Tuple[List[str], List[float]]:
+    """
+    Lee un CSV con columnas title, description, prob_m y prob_f. Si tiene
+    method_used o duplicate_of, se filtra igual que en la base de datos.
+    """
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        rows = [
+            row for row in csv.DictReader(f)
+            if row.get("method_used", "ensemble") == "ensemble" and not row.get("duplicate_of")
+        ]
+    return _to_examples(rows)
+
+
+def _to_examples(rows) -> Tuple[List[str], List[float]]:
+    """Prepara el texto tal como lo ve RoBERTa y normaliza la probabilidad masculina."""
+    from gender_bias_analyzer import prepare_model_text
+
+    texts, targets = [], []
+    for row in rows:
+        prob_m, prob_f = float(row["prob_m"] or 0), float(row["prob_f"] or 0)
+        if prob_m + prob_f <= 0:
+            continue
+        texts.append(prepare_model_text(f"{row['title'] or ''}. {row['description'] or ''}"))
+        targets.append(prob_m / (prob_m + prob_f))
+    return texts, targets
+
+
+def train_and_report(texts: List[str], targets: List[float], output_path: str,
+                     test_size: float = 0.2, seed: int = 42) -> Dict:
+    """
+    Entrena el estudiante, lo guarda y evalúa su acuerdo con el profesor en un conjunto de prueba.
+    """
+    if len(texts) < 10:
+        raise ValueError(f"Se necesitan al menos 10 ofertas puntuadas, hay {len(texts)}")
+
+    indices = list(range(len(texts)))
+    random.Random(seed).shuffle(indices)
+    n_test = max(1, int(len(indices) * test_size))
+    test_idx, train_idx = indices[:n_test], indices[n_test:]
+
+    student = build_student()
+    start = time.perf_counter()
+    student.regressor.fit(
+        student.vectorizer.transform([texts[i] for i in train_idx]),
+        np.array([targets[i] for i in train_idx]),
+    )
+    train_seconds = time.perf_counter() - start
+    student.save(output_path)
+    logger.info(f"Estudiante entrenado con {len(train_idx)} ofertas y guardado en {output_path}")
+
+    test_texts = [texts[i] for i in test_idx]
+    teacher = np.array([targets[i] for i in test_idx])
+
+    # Latencia por oferta, una a una como en /api/analyze
+    start = time.perf_counter()
+    predicted = np.array([student.predict_prob_m([t])[0] for t in test_texts])
+    latency_ms = 1000 * (time.perf_counter() - start) / len(test_texts)
+
+    return {
+        "train_size": len(train_idx),
+        "test_size": len(test_idx),
+        "train_seconds": round(train_seconds, 2),
+        "class_agreement": round(float(np.mean((predicted >= 0.5) == (teacher >= 0.5))), 4),
+        "prob_m_mae": round(float(np.mean(np.abs(predicted - teacher))), 4),
+        "prob_m_pearson": round(float(np.corrcoef(predicted, teacher)[0, 1]), 4) if len(test_idx) > 1 else None,
+        "student_latency_ms": round(latency_ms, 3),
+    }
+
+
+def measure_teacher_latency(texts: List[str]) -> float:
+    """Mide la latencia media por oferta de RoBERTa (carga el modelo profesor)."""
+    from gender_bias_analyzer import AdvancedBiasAnalyzer
+
+    analyzer = AdvancedBiasAnalyzer(use_roberta=True)
+    if analyzer.classifier is None:
+        raise RuntimeError("No se pudo cargar RoBERTa para medir su latencia")
+    start = time.perf_counter()
+    for t in texts:
+        analyzer.classifier(t)
+    return 1000 * (time.perf_counter() - start) / len(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Destila RoBERTa en un clasificador lineal ligero")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--db", help="URL de PostgreSQL con fact_job_post y fact_bias_assessment")
+    source.add_argument("--csv", help="CSV con columnas title, description, prob_m y prob_f")
+    parser.add_argument("--model-ver", default=TEACHER_MODEL_VER,
+                        help="Versión del profesor en fact_bias_assessment")
+    parser.add_argument("-o", "--output", default=DEFAULT_STUDENT_PATH, help="Ruta del modelo estudiante")
+    parser.add_argument("--report", help="Ruta opcional para guardar el reporte en JSON")
+    parser.add_argument("--teacher-latency", type=int, default=0, metavar="N",
+                        help="Mide la latencia de RoBERTa sobre N ofertas para comparar")
+    args = parser.parse_args()
+
+    if args.db:
+        texts, targets = load_teacher_corpus_from_db(args.db, args.model_ver)
+    else:
+        texts, targets = load_teacher_corpus_from_csv(args.csv)
+
+    report = train_and_report(texts, targets, args.output)
+    if args.teacher_latency:
+        teacher_ms = measure_teacher_latency(texts[:args.teacher_latency])
+        report["teacher_latency_ms"] = round(teacher_ms, 3)
+        report["speedup"] = round(teacher_ms / max(report["student_latency_ms"], 1e-9), 1)
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Evalúa offline el compromiso precisión/rendimiento del modo cascada.
+
+Ejecuta el análisis léxico y RoBERTa sobre todo el corpus (midiendo el tiempo
+de cada etapa) y luego simula cada combinación de umbrales: qué fracción de
+ofertas omitiría RoBERTa, cuánto coincide su predicción con el ensemble
+completo y qué throughput resultaría. Uso:
+
+    python evaluate_cascade.py [sample_offers.csv] --thresholds 0.2:0.8 0.1:0.9 --min-hits 2 3
+"""
+
+import argparse
+import json
+import time
+from typing import Dict, List, Tuple
+
+from compare_lemmatizers import load_corpus
+from gender_bias_analyzer import AdvancedBiasAnalyzer, CascadeConfig
+
+
+def _parse_threshold(value: str) -> Tuple[float, float]:
+    """Convierte 'low:high' en una tupla de floats."""
+    low, high = value.split(":")
+    return float(low), float(high)
+
+
+def score_corpus(analyzer: AdvancedBiasAnalyzer, texts: List[str]) -> List[Dict]:
+    """Calcula el resultado léxico y contextual de cada texto con sus tiempos."""
+    rows = []
+    for text in texts:
+        start = time.perf_counter()
+        masc_hits, fem_hits, lex_score, _ = analyzer._lexical_analysis(text)
+        lexical_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        prob_M, prob_F, _ = analyzer._roberta_analysis(text)
+        roberta_seconds = time.perf_counter() - start
+
+        contextual = prob_M / (prob_M + prob_F) if (prob_M + prob_F) > 0 else 0.5
+        rows.append({
+            "masc_hits": masc_hits,
+            "fem_hits": fem_hits,
+            "lex_score": lex_score,
+            "ensemble_score": 0.4 * lex_score + 0.6 * contextual,
+            "lexical_seconds": lexical_seconds,
+            "roberta_seconds": roberta_seconds,
+        })
+    return rows
+
+
+def simulate(rows: List[Dict], cascade: CascadeConfig) -> Dict:
+    """Aplica los umbrales de la cascada a resultados ya calculados."""
+    n = max(len(rows), 1)
+    skipped = agree = 0
+    abs_error = seconds = 0.0
+    for row in rows:
+        seconds += row["lexical_seconds"]
+        reference = 'M' if row["ensemble_score"] > 0.5 else 'F'
+        if cascade.is_decisive(row["masc_hits"], row["fem_hits"], row["lex_score"]):
+            skipped += 1
+            final = row["lex_score"]
+        else:
+            seconds += row["roberta_seconds"]
+            final = row["ensemble_score"]
+        agree += reference == ('M' if final > 0.5 else 'F')
+        abs_error += abs(final - row["ensemble_score"])
+
+    return {
+        "low": cascade.low,
+        "high": cascade.high,
+        "min_hits": cascade.min_hits,
+        "skip_rate": round(skipped / n, 4),
+        "agreement_with_ensemble": round(agree / n, 4),
+        "final_score_mae": round(abs_error / n, 4),
+        "docs_per_second": round(len(rows) / seconds, 2) if seconds else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evalúa umbrales del modo cascada léxico -> RoBERTa")
+    parser.add_argument("corpus", nargs="?", default="sample_offers.csv",
+                        help="CSV con columna 'description' o archivo de texto (una oferta por línea)")
+    parser.add_argument("--thresholds", nargs="+", type=_parse_threshold, default=[(0.2, 0.8)],
+                        help="Pares low:high de lex_score a evaluar")
+    parser.add_argument("--min-hits", nargs="+", type=int, default=[CascadeConfig.min_hits],
+                        help="Hits léxicos mínimos a evaluar")
+    parser.add_argument("-o", "--output", help="Ruta opcional para guardar el reporte en JSON")
+    args = parser.parse_args()
+
+    analyzer = AdvancedBiasAnalyzer()
+    if analyzer.classifier is None:
+        raise SystemExit("RoBERTa no está disponible: no hay nada que comparar")
+
+    rows = score_corpus(analyzer, load_corpus(args.corpus))
+    baseline_seconds = sum(r["lexical_seconds"] + r["roberta_seconds"] for r in rows)
+    report = {
+        "documents": len(rows),
+        "ensemble_docs_per_second": round(len(rows) / baseline_seconds, 2) if baseline_seconds else None,
+        "cascades": [
+            simulate(rows, CascadeConfig(enabled=True, low=low, high=high, min_hits=min_hits))
+            for low, high in args.thresholds
+            for min_hits in args.min_hits
+        ],
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Explicaciones del análisis: atribuciones por palabra del score contextual
+(attention rollout o gradiente × entrada) y posiciones de los términos
+léxicos, todas expresadas como offsets de caracteres del texto original.
+"""
+
+import re
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import torch
+from unidecode import unidecode
+
+EXPLAIN_METHODS = ("attention", "gradient")
+
+URL_RE = re.compile(r"https?://\S+")
+MODEL_MAX_CHARS = 512
+
+
+def lexical_text_with_offsets(texto: str) -> Tuple[str, List[int]]:
+    """
+    Reproduce la limpieza de _lemmatize (URLs, normalize, solo letras) carácter
+    a carácter y devuelve, para cada carácter resultante, su índice en el texto original.
+    """
+    # URLs -> un espacio
+    chars: List[Tuple[str, int]] = []
+    pos = 0
+    for m in URL_RE.finditer(texto):
+        chars.extend((c, pos + i) for i, c in enumerate(texto[pos:m.start()]))
+        chars.append((" ", m.start()))
+        pos = m.end()
+    chars.extend((c, pos + i) for i, c in enumerate(texto[pos:]))
+
+    # normalize(): minúsculas, strip y unidecode
+    chars = [(lc, idx) for c, idx in chars for lc in c.lower()]
+    start, end = 0, len(chars)
+    while start < end and chars[start][0].isspace():
+        start += 1
+    while end > start and chars[end - 1][0].isspace():
+        end -= 1
+    chars = [(u, idx) for c, idx in chars[start:end] for u in unidecode(c)]
+
+    # Cada tramo de caracteres que no son letras se reemplaza por un solo espacio
+    text, offsets = [], []
+    in_run = False
+    for c, idx in chars:
+        if re.match(r"[a-zñ ]", c):
+            text.append(c)
+            offsets.append(idx)
+            in_run = False
+        elif not in_run:
+            text.append(" ")
+            offsets.append(idx)
+            in_run = True
+    return "".join(text), offsets
+
+
+def model_text_with_offsets(description: str) -> Tuple[str, List[int]]:
+    """Igual que prepare_model_text, con el índice original de cada carácter."""
+    chars: List[Tuple[str, int]] = []
+    pos = 0
+    for m in URL_RE.finditer(description):
+        chars.extend((c, pos + i) for i, c in enumerate(description[pos:m.start()]))
+        pos = m.end()
+    chars.extend((c, pos + i) for i, c in enumerate(description[pos:]))
+    chars = [(" " if re.match(r"[^\w\s]", c) else c, idx) for c, idx in chars][:MODEL_MAX_CHARS]
+    return "".join(c for c, _ in chars), [idx for _, idx in chars]
+
+
+@contextmanager
+def eager_attention(model):
+    """
+    Cambia temporalmente el modelo a atención "eager": las implementaciones
+    optimizadas (sdpa, flash) no devuelven los pesos de atención.
+    """
+    impl = getattr(model.config, "_attn_implementation", None)
+    if impl in (None, "eager") or not hasattr(model, "set_attn_implementation"):
+        yield
+        return
+    model.set_attn_implementation("eager")
+    try:
+        yield
+    finally:
+        model.set_attn_implementation(impl)
+
+
+def attention_rollout(attentions) -> torch.Tensor:
+    """
+    Attention rollout (Abnar & Zuidema, 2020): propaga la atención media por
+    cabeza a través de las capas, sumando la conexión residual.
+
+    Returns:
+        Importancia de cada token para el token <s> de clasificación
+    """
+    # capas x cabezas x T x T (batch de un elemento)
+    att = torch.stack([a[0] for a in attentions]).mean(dim=1)
+    eye = torch.eye(att.size(-1), device=att.device)
+    rollout = eye
+    for layer in att:
+        layer = layer + eye
+        layer = layer / layer.sum(dim=-1, keepdim=True)
+        rollout = layer @ rollout
+    return rollout[0]
+
+
+def word_attributions(description: str, token_offsets: List[Tuple[int, int]],
+                      scores: List[float], char_offsets: List[int]) -> List[Dict]:
+    """
+    Agrupa las puntuaciones de subpalabras en palabras (tokens contiguos) y las
+    devuelve con offsets en el texto original.
+    """
+    words = []
+    prev_end = None
+    for (start, end), score in zip(token_offsets, scores):
+        if start == end:  # Tokens especiales
+            prev_end = None
+            continue
+        if prev_end is not None and start == prev_end:
+            words[-1]["end_char"] = end
+            words[-1]["score"] += score
+        else:
+            words.append({"start_char": start, "end_char": end, "score": score})
+        prev_end = end
+
+    spans = []
+    for w in words:
+        start, end = char_offsets[w["start_char"]], char_offsets[w["end_char"] - 1] + 1
+        spans.append({"text": description[start:end], "start": start, "end": end, "score": round(w["score"], 4)})
+    return spans
+
+
+def overlap_score(start: Optional[int], end: Optional[int], attributions: List[Dict]) -> Optional[float]:
+    """Suma las atribuciones contextuales que se solapan con un tramo de caracteres."""
+    if start is None or not attributions:
+        return None
+    return round(sum(a["score"] for a in attributions if a["start"] < end and start < a["end"]), 4)
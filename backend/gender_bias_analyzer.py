@@ -1,32 +1,83 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import pandas as pd
 import numpy as np
+import os
 import re
+import time
 import unicodedata
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 
 # Procesamiento de texto
-from unidecode import unidecode
 import spacy
 from nltk.corpus import stopwords
 
+# Léxico precompilado
+from lexicon_compiler import (
+    CATEGORIES,
+    DEFAULT_ARTIFACT_PATH,
+    load_compiled_lexicon,
+    normalize,
+    parse_gender_lexicon,
+    parse_tic_lexicon,
+)
+
 # Modelos de transformers
 from transformers import (
     AutoTokenizer, 
-    AutoModelForSequenceClassification,
     pipeline
 )
 import torch
 
+# Carga del modelo con memory-map y precisión reducida
+from model_loading import ModelLoadConfig, load_sequence_classifier, rss_mb
+
+# Hilos y afinidad de CPU
+from runtime_tuning import ThreadConfig, apply_thread_config, autotune_intra_op_threads
+
+# Plazos por petición y cola de inferencia
+from deadlines import DEGRADED_METHOD, Deadline, DeadlineConfig, InferenceGate
+
+# Explicaciones (atribuciones y offsets de caracteres)
+from explainability import (
+    EXPLAIN_METHODS,
+    attention_rollout,
+    eager_attention,
+    lexical_text_with_offsets,
+    model_text_with_offsets,
+    overlap_score,
+    word_attributions,
+)
+
 # Configuración de logging
 import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Tamaño por defecto de las cachés de normalización y lematización
+DEFAULT_CACHE_SIZE = 50000
+
+# Modos de lematización: "full" usa el pipeline completo de es_core_news_md;
+# "fast" usa un lematizador por tabla de búsqueda sin tagger ni vectores
+LEMMATIZER_MODES = ("full", "fast")
+SPACY_MODEL = "es_core_news_md"
+
+# Modelos contextuales disponibles, por versión de modelo (model_ver)
+# (ROBERTA_MODEL permite usar un modelo local, p. ej. el sustituto de load_harness.py)
+ROBERTA_MODEL = os.getenv("ROBERTA_MODEL", "PlanTL-GOB-ES/roberta-base-bne")
+ENSEMBLE_MODEL_VER = "v2.0_ensemble"     # RoBERTa completo
+DISTILLED_MODEL_VER = "v2.1_distilled"   # Estudiante destilado (ver distill_student.py)
+# Versión con la que se guardan los resultados cuando no hay modelo contextual
+# (--lexical-only o fallo al cargarlo): sus probabilidades 0.5/0.5 no son del profesor
+LEXICAL_MODEL_VER = "v2.0_lexical"
+MODEL_VERSIONS = (ENSEMBLE_MODEL_VER, DISTILLED_MODEL_VER)
+
+# Los léxicos se buscan junto al módulo, sea cual sea el directorio de trabajo
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 @dataclass
 class BiasResult:
     """Resultado del análisis de sesgo para una oferta de trabajo."""
@@ -39,6 +90,63 @@ class BiasResult:
     model_ver: str
     evaluated_at: datetime
     detected_terms: Dict[str, List[str]]  # Términos detectados por categoría
+    job_id: Optional[object] = None
+    contextual_score: float = 0.5
+    final_score: float = 0.5
+    confidence: float = 0.5
+    method_used: str = "lexical"
+    is_tic: bool = False
+    duplicate_of: Optional[object] = None          # Oferta canónica cuyo resultado se reutilizó
+    duplicate_similarity: Optional[float] = None   # Jaccard estimada con esa oferta
+
+    @classmethod
+    def from_analysis(cls, result: Dict, model_ver: str, job_id=None,
+                      evaluated_at: Optional[datetime] = None) -> "BiasResult":
+        """Construye el resultado persistible a partir de la salida de analyze()/analyze_batch()."""
+        return cls(
+            masc_hits=result["masculine_hits"],
+            fem_hits=result["feminine_hits"],
+            lex_score=result["lexical_score"],
+            prob_M=result["roberta_probabilities"]["masculine"],
+            prob_F=result["roberta_probabilities"]["feminine"],
+            class_pred=result["class_pred"],
+            model_ver=model_ver,
+            evaluated_at=evaluated_at or datetime.now(),
+            detected_terms=result["detected_terms"],
+            job_id=job_id,
+            contextual_score=result["contextual_score"],
+            final_score=result["final_prediction"],
+            confidence=result["confidence"],
+            method_used=result["method_used"],
+            is_tic=result["is_tic"],
+        )
+
+@dataclass
+class CascadeConfig:
+    """
+    Umbrales del modo cascada: si el análisis léxico es decisivo
+    (suficientes hits y lex_score en un extremo) no se ejecuta RoBERTa.
+    """
+    enabled: bool = False
+    low: float = 0.2       # lex_score <= low se considera claramente femenino
+    high: float = 0.8      # lex_score >= high se considera claramente masculino
+    min_hits: int = 3      # Hits léxicos (M + F) mínimos para confiar en el léxico
+
+    @classmethod
+    def from_env(cls) -> "CascadeConfig":
+        """Lee la configuración de las variables CASCADE_ENABLED, CASCADE_LOW, CASCADE_HIGH y CASCADE_MIN_HITS."""
+        return cls(
+            enabled=os.getenv("CASCADE_ENABLED", "false").lower() in ("1", "true", "yes"),
+            low=float(os.getenv("CASCADE_LOW", cls.low)),
+            high=float(os.getenv("CASCADE_HIGH", cls.high)),
+            min_hits=int(os.getenv("CASCADE_MIN_HITS", cls.min_hits)),
+        )
+
+    def is_decisive(self, masc_hits: int, fem_hits: int, lex_score: float) -> bool:
+        """Indica si el resultado léxico basta para omitir el modelo contextual."""
+        if not self.enabled or masc_hits + fem_hits < self.min_hits:
+            return False
+        return lex_score <= self.low or lex_score >= self.high
 
 class AdvancedBiasAnalyzer:
     """
@@ -48,29 +156,66 @@ class AdvancedBiasAnalyzer:
     3. Ensemble de ambos métodos
     """
     
-    def __init__(self, lexicon_path: str = "lexicon_definitivo.csv", tic_lexicon_path: str = "lexicon_tic.csv"):
+    def __init__(self, lexicon_path: str = os.path.join(BASE_DIR, "lexicon_definitivo.csv"),
+                 tic_lexicon_path: str = os.path.join(BASE_DIR, "lexicon_tic.csv"),
+                 lexicon_artifact_path: str = os.path.join(BASE_DIR, DEFAULT_ARTIFACT_PATH),
+                 cache_size: int = DEFAULT_CACHE_SIZE,
+                 lemmatizer_mode: str = "full", use_roberta: bool = True,
+                 cascade: Optional[CascadeConfig] = None, model_ver: str = ENSEMBLE_MODEL_VER,
+                 student_path: Optional[str] = None, threads: Optional[ThreadConfig] = None,
+                 deadlines: Optional[DeadlineConfig] = None, model_load: Optional[ModelLoadConfig] = None):
         """
         Inicializa el analizador con léxico.
         Args:
             lexicon_path: Ruta al archivo CSV del léxico
             tic_lexicon_path: Ruta al archivo CSV del léxico TIC
+            lexicon_artifact_path: Ruta al léxico precompilado (ver lexicon_compiler.py)
+            cache_size: Número máximo de entradas en cada caché de normalización/lemas
+            lemmatizer_mode: "full" (pipeline spaCy completo) o "fast" (lematizador por tabla)
+            use_roberta: Si es False no se carga RoBERTa y solo se usa el análisis léxico
+            cascade: Umbrales para omitir RoBERTa cuando el léxico es decisivo (desactivado por defecto)
+            model_ver: Modelo contextual: RoBERTa (v2.0_ensemble) o estudiante destilado (v2.1_distilled)
+            student_path: Ruta del modelo estudiante cuando model_ver es v2.1_distilled
+            threads: Hilos de torch/BLAS y afinidad (por defecto, núcleos repartidos entre workers)
+            deadlines: Plazos del API y límites de la cola del modelo contextual (ver deadlines.py)
+            model_load: Precisión de los pesos y modo de carga de RoBERTa (ver model_loading.py)
         """
+        init_start = time.perf_counter()
+        if model_ver not in MODEL_VERSIONS:
+            raise ValueError(f"model_ver debe ser uno de {MODEL_VERSIONS}, no {model_ver!r}")
+        self.model_ver = model_ver
+        self.student_path = student_path
+        self.cascade = cascade or CascadeConfig()
+        self.deadlines = deadlines or DeadlineConfig()
+        self.inference_gate = InferenceGate(self.deadlines.max_concurrency, self.deadlines.max_queue)
+        self.model_load = model_load or ModelLoadConfig()
+        self.model_load_report = None
+        if lemmatizer_mode not in LEMMATIZER_MODES:
+            raise ValueError(f"lemmatizer_mode debe ser uno de {LEMMATIZER_MODES}, no {lemmatizer_mode!r}")
+        self.lemmatizer_mode = lemmatizer_mode
+        # Cachés acotadas (LRU): palabra -> forma normalizada y
+        # (id de token, id de lema) en el StringStore de spaCy -> lema normalizado
+        self._normalize_cache = lru_cache(maxsize=cache_size)(normalize)
+        self._token_lemma_cache = lru_cache(maxsize=cache_size)(self._resolve_token_lemma)
+        
         self.lexicon_path = lexicon_path
         self.tic_lexicon_path = tic_lexicon_path
+        self.lexicon_artifact_path = lexicon_artifact_path
+        # Léxico precompilado, si existe y está al día con los CSV
+        self._compiled_lexicon = load_compiled_lexicon(
+            lexicon_artifact_path, lexicon_path, tic_lexicon_path
+        )
         # Cargar léxico
         self._load_lexicon()
         # Cargar léxico TIC
         self._load_tic_lexicon()
         
+        # Limitar hilos antes de cargar spaCy y torch para no sobresuscribir la CPU
+        self.thread_config = threads or ThreadConfig.from_env()
+        self.thread_settings = apply_thread_config(self.thread_config)
+        
         # Cargar modelo spaCy
-        logger.info("Cargando modelo spaCy...")
-        try:
-            self.nlp = spacy.load("es_core_news_md", disable=["ner", "parser"])
-        except OSError:
-            logger.warning("Modelo spaCy no encontrado. Instalando...")
-            import subprocess
-            subprocess.run(["python", "-m", "spacy", "download", "es_core_news_md"])
-            self.nlp = spacy.load("es_core_news_md", disable=["ner", "parser"])
+        self.nlp = self._load_spacy_model()
         
         # Cargar stop words
         try:
@@ -78,55 +223,82 @@ class AdvancedBiasAnalyzer:
         except LookupError:
             logger.warning("Stop words no encontradas. Descargando...")
             import nltk
-            nltk.download('stopwords')
-            self.stop_es = {self._normalize(w) for w in stopwords.words("spanish")}
+            if nltk.download('stopwords', quiet=True):
+                self.stop_es = {self._normalize(w) for w in stopwords.words("spanish")}
+            else:
+                # Sin conexión: lista de stop words en español de spaCy
+                from spacy.lang.es.stop_words import STOP_WORDS
+                logger.warning("No se pudieron descargar; se usan las stop words de spaCy")
+                self.stop_es = {self._normalize(w) for w in STOP_WORDS}
         
         # Cargar modelo RoBERTa
-        self._load_roberta_model()
+        if use_roberta:
+            self._load_roberta_model()
+        else:
+            self.classifier = None
+            self.contextual_model_name = None
         
-        logger.info("Analizador inicializado correctamente")
+        logger.info(f"Analizador inicializado correctamente en {time.perf_counter() - init_start:.1f}s "
+                    f"(RSS {rss_mb()} MB)")
+    
+    @property
+    def result_model_ver(self) -> str:
+        """Versión con la que se guardan los resultados: la del modelo contextual o la léxica si no hay."""
+        return self.model_ver if self.classifier is not None else LEXICAL_MODEL_VER
+    
+    def _load_spacy_model(self):
+        """Carga el pipeline de spaCy según el modo de lematización."""
+        if self.lemmatizer_mode == "fast":
+            logger.info("Cargando lematizador rapido (lookup, sin tagger ni vectores)...")
+            try:
+                return load_fast_lemmatizer()
+            except Exception as e:
+                # Requiere el paquete spacy-lookups-data
+                logger.warning(f"No se pudo cargar el lematizador rapido: {e}")
+                logger.info("Usando pipeline spaCy completo")
+                self.lemmatizer_mode = "full"
+        
+        logger.info("Cargando modelo spaCy...")
+        try:
+            return spacy.load(SPACY_MODEL, disable=["ner", "parser"])
+        except OSError:
+            logger.warning("Modelo spaCy no encontrado. Instalando...")
+            import subprocess
+            subprocess.run(["python", "-m", "spacy", "download", SPACY_MODEL])
+            return spacy.load(SPACY_MODEL, disable=["ner", "parser"])
     
     def _load_lexicon(self):
         """Carga y prepara el léxico de términos de género."""
-        logger.info("Cargando lexico...")
-        
-        lex = (
-            pd.read_csv(self.lexicon_path, encoding="utf-8-sig", keep_default_na=False)
-              .rename(columns=lambda c: c.strip().lower())
-        )
-        
-        lex["categoria"] = (
-            lex["categoria"]
-               .str.replace("\ufeff", "", regex=False)
-               .str.strip().str.lower()
-        )
+        if self._compiled_lexicon is not None:
+            logger.info(f"Cargando lexico precompilado desde {self.lexicon_artifact_path}...")
+            terms = self._compiled_lexicon["terms"]
+        else:
+            logger.info("Cargando lexico desde CSV...")
+            terms = parse_gender_lexicon(self.lexicon_path)
         
-        self.masc_terms, self.fem_terms, self.neutral_terms = set(), set(), set()
-        for _, r in lex.iterrows():
-            base = self._normalize(r["termino_base"])
-            variants = [self._normalize(v) for v in re.split(r"[;,|\t]", r["variantes"]) if v]
-            
-            if r["categoria"] == "masculino":
-                self.masc_terms.update([base, *variants])
-            elif r["categoria"] == "femenino":
-                self.fem_terms.update([base, *variants])
-            elif r["categoria"] == "neutral":
-                self.neutral_terms.update([base, *variants])
+        masc, fem, neutral = (set(terms[CATEGORIES.index(c)]) for c in ("masculino", "femenino", "neutral"))
+        self.masc_terms, self.fem_terms, self.neutral_terms = masc, fem, neutral
         
         logger.info(f"Lexico cargado: {len(self.masc_terms)} terminos masculinos, "
                    f"{len(self.fem_terms)} femeninos, {len(self.neutral_terms)} neutrales")
     
     def _load_roberta_model(self):
-        """Carga el modelo RoBERTa para clasificación de género."""
+        """Carga el modelo contextual (RoBERTa o su estudiante destilado) para clasificación de género."""
+        if self.model_ver == DISTILLED_MODEL_VER:
+            self._load_distilled_model()
+            return
+        
         logger.info("Cargando modelo RoBERTa...")
         
         # Usar un modelo RoBERTa multilingüe fine-tuned para clasificación de género
-        model_name = "PlanTL-GOB-ES/roberta-base-bne"  # Modelo español de RoBERTa
+        model_name = ROBERTA_MODEL  # Modelo español de RoBERTa
+        self.contextual_model_name = model_name
         
         try:
             self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.model = AutoModelForSequenceClassification.from_pretrained(
+            self.model, self.model_load_report = load_sequence_classifier(
                 model_name, 
+                self.model_load,
                 num_labels=2  # Masculino/Femenino
             )
             
@@ -140,57 +312,137 @@ class AdvancedBiasAnalyzer:
             
             logger.info("Modelo RoBERTa cargado correctamente")
             
+            if self.thread_config.autotune:
+                self.thread_settings["intra_op_threads"] = autotune_intra_op_threads(
+                    self.model, self.tokenizer, self.thread_config.default_threads()
+                )
+            
         except Exception as e:
             logger.warning(f"No se pudo cargar el modelo RoBERTa: {e}")
             logger.info("Usando solo analisis lexico")
             self.classifier = None
     
+    def _load_distilled_model(self):
+        """Carga el estudiante destilado, que expone la misma interfaz que el pipeline de RoBERTa."""
+        from distill_student import DEFAULT_STUDENT_PATH, DistilledClassifier
+        
+        path = self.student_path or DEFAULT_STUDENT_PATH
+        logger.info(f"Cargando modelo destilado desde {path}...")
+        self.contextual_model_name = f"distilled:{os.path.basename(path)}"
+        try:
+            self.classifier = DistilledClassifier.load(path)
+            logger.info("Modelo destilado cargado correctamente")
+        except Exception as e:
+            logger.warning(f"No se pudo cargar el modelo destilado: {e}")
+            logger.info("Usando solo analisis lexico")
+            self.classifier = None
+    
     def _load_tic_lexicon(self):
-        """Carga el léxico TIC desde un archivo CSV simple (columna 'termino')."""
-        import csv
-        self.tic_terms = set()
+        """Carga el léxico TIC desde el artefacto precompilado o el CSV (columna 'termino')."""
+        if self._compiled_lexicon is not None:
+            self.tic_terms = set(self._compiled_lexicon["tic_terms"])
+            logger.info(f"Léxico TIC cargado: {len(self.tic_terms)} términos.")
+            return
         try:
-            with open(self.tic_lexicon_path, encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    term = row.get("termino", "").strip().lower()
-                    if term:
-                        self.tic_terms.add(self._normalize(term))
+            self.tic_terms = set(parse_tic_lexicon(self.tic_lexicon_path))
             logger.info(f"Léxico TIC cargado: {len(self.tic_terms)} términos.")
         except Exception as e:
             logger.warning(f"No se pudo cargar el léxico TIC: {e}")
             self.tic_terms = set()
 
-    def is_tic_offer(self, description: str, threshold: int = 2) -> bool:
+    def is_tic_offer(self, description: str, threshold: int = 2, lemmas: Optional[set] = None) -> bool:
         """Determina si una oferta pertenece al área TIC según el léxico TIC."""
-        lemmas = set(self._lemmatize(description))
+        if lemmas is None:
+            lemmas = set(self._lemmatize(description))
         matches = lemmas & self.tic_terms
         return len(matches) >= threshold
     
     def _normalize(self, txt: str) -> str:
-        """Normaliza texto: minúsculas, sin tildes ni espacios sobrantes."""
-        return unidecode(txt.lower().strip())
+        """Normaliza una palabra: minúsculas, sin tildes ni espacios sobrantes (con caché)."""
+        return self._normalize_cache(txt)
+    
+    def _resolve_token_lemma(self, orth: int, lemma: int) -> Optional[str]:
+        """Devuelve el lema normalizado de un token, o None si es stop word."""
+        strings = self.nlp.vocab.strings
+        if self._normalize(strings[orth]) in self.stop_es:
+            return None
+        return self._normalize(strings[lemma])
+    
+    def _lexical_text(self, texto: str) -> str:
+        """Limpia el texto para lematizar: sin URLs, normalizado y solo letras."""
+        # El texto completo no pasa por la caché: casi nunca se repite
+        texto = normalize(re.sub(r"https?://\S+", " ", texto))
+        return re.sub(r"[^a-zñ ]+", " ", texto)
     
     def _lemmatize(self, texto: str) -> List[str]:
         """Devuelve lista de lemas normalizados de un texto en español."""
-        texto = self._normalize(re.sub(r"https?://\S+", " ", texto))
-        texto = re.sub(r"[^a-zñ ]+", " ", texto)
-        doc = self.nlp(texto)
-        
-        return [
-            self._normalize(tok.lemma_)
-            for tok in doc
-            if tok.is_alpha and self._normalize(tok.text) not in self.stop_es
-        ]
+        return self._doc_lemmas(self.nlp(self._lexical_text(texto)))
     
-    def _lexical_analysis(self, description: str) -> Tuple[int, int, float, Dict[str, List[str]]]:
+    def _lemmatize_many(self, textos: List[str], batch_size: int = 64) -> List[List[str]]:
+        """Como _lemmatize, procesando los textos por lotes con nlp.pipe."""
+        docs = self.nlp.pipe((self._lexical_text(t) for t in textos), batch_size=batch_size)
+        return [self._doc_lemmas(doc) for doc in docs]
+    
+    def _doc_lemmas(self, doc) -> List[str]:
+        """Lemas normalizados de los tokens alfabéticos de un Doc, sin stop words."""
+        lemmas = []
+        for tok in doc:
+            if not tok.is_alpha:
+                continue
+            lemma = self._token_lemma_cache(tok.orth, tok.lemma)
+            if lemma is not None:
+                lemmas.append(lemma)
+        return lemmas
+    
+    def _lemmatize_spans(self, texto: str) -> List[Tuple[str, Optional[int], Optional[int]]]:
+        """
+        Como _lemmatize, pero devuelve (lema, inicio, fin) con los offsets de
+        cada token en el texto original.
+        """
+        clean, offsets = lexical_text_with_offsets(texto)
+        if clean != self._lexical_text(texto):
+            # Casos raros (p. ej. minúsculas dependientes del contexto): sin offsets
+            logger.debug("No se pudieron alinear los offsets del texto lematizado")
+            return [(lemma, None, None) for lemma in self._lemmatize(texto)]
+        
+        spans = []
+        for tok in self.nlp(clean):
+            if not tok.is_alpha:
+                continue
+            lemma = self._token_lemma_cache(tok.orth, tok.lemma)
+            if lemma is not None:
+                spans.append((lemma, offsets[tok.idx], offsets[tok.idx + len(tok.text) - 1] + 1))
+        return spans
+    
+    def cache_stats(self) -> Dict[str, Dict[str, float]]:
+        """Devuelve aciertos, fallos, tamaño y tasa de acierto de cada caché."""
+        stats = {}
+        for name, cache in (("normalize", self._normalize_cache), ("token_lemma", self._token_lemma_cache)):
+            info = cache.cache_info()
+            lookups = info.hits + info.misses
+            stats[name] = {
+                "hits": info.hits,
+                "misses": info.misses,
+                "size": info.currsize,
+                "max_size": info.maxsize,
+                "hit_rate": round(info.hits / lookups, 4) if lookups else 0.0,
+            }
+        return stats
+    
+    def _lexical_analysis(self, description: str,
+                          lemmas: Optional[set] = None) -> Tuple[int, int, float, Dict[str, List[str]]]:
         """
         Realiza análisis léxico tradicional.
         
+        Args:
+            description: Texto de la oferta
+            lemmas: Lemas ya calculados del texto (se lematiza si no se indican)
+        
         Returns:
             Tuple con (hits_masculinos, hits_femeninos, bias_score, términos_detectados)
         """
-        lemmas = set(self._lemmatize(description))
+        if lemmas is None:
+            lemmas = set(self._lemmatize(description))
         
         # Detectar términos específicos
         detected_masc = list(lemmas & self.masc_terms)
@@ -223,68 +475,250 @@ class AdvancedBiasAnalyzer:
         
         try:
             # Preparar texto para el modelo
-            clean_text = re.sub(r'https?://\S+', '', description)
-            clean_text = re.sub(r'[^\w\s]', ' ', clean_text)
-            clean_text = clean_text[:512]  # Limitar longitud
+            clean_text = prepare_model_text(description)
             
             # Clasificar
-            result = self.classifier(clean_text)[0]
-            
-            # Interpretar resultados (ajustar según el modelo específico)
-            if result['label'] == 'LABEL_0':  # Masculino
-                prob_M = result['score']
-                prob_F = 1 - result['score']
-                pred = 'M'
-            else:  # Femenino
-                prob_F = result['score']
-                prob_M = 1 - result['score']
-                pred = 'F'
-            
-            return prob_M, prob_F, pred
+            return self._parse_prediction(self.classifier(clean_text)[0])
             
         except Exception as e:
             logger.error(f"Error en analisis RoBERTa: {e}")
             return 0.5, 0.5, 'N'
     
-    def analyze(self, text: str) -> Dict:
+    def _roberta_analysis_batch(self, descriptions: List[str], batch_size: int = 16) -> List[Tuple[float, float, str]]:
+        """Como _roberta_analysis, clasificando los textos por lotes en el modelo."""
+        if self.classifier is None:
+            return [(0.5, 0.5, 'N')] * len(descriptions)
+        if not descriptions:
+            return []
+        
+        try:
+            results = self.classifier([prepare_model_text(d) for d in descriptions], batch_size=batch_size)
+            return [self._parse_prediction(r) for r in results]
+        except Exception as e:
+            # Un texto problemático no debe invalidar el lote: reintentar uno a uno
+            logger.error(f"Error en lote RoBERTa, reintentando individualmente: {e}")
+            return [self._roberta_analysis(d) for d in descriptions]
+    
+    @staticmethod
+    def _parse_prediction(result: Dict) -> Tuple[float, float, str]:
+        """Convierte la salida del clasificador en (prob_masculino, prob_femenino, prediccion)."""
+        # Interpretar resultados (ajustar según el modelo específico)
+        if result['label'] == 'LABEL_0':  # Masculino
+            prob_M = result['score']
+            prob_F = 1 - result['score']
+            pred = 'M'
+        else:  # Femenino
+            prob_F = result['score']
+            prob_M = 1 - result['score']
+            pred = 'F'
+        
+        return prob_M, prob_F, pred
+    
+    def _roberta_explain(self, description: str, method: str) -> Tuple[float, float, str, List[Dict]]:
+        """
+        Análisis RoBERTa con atribuciones por palabra calculadas en la misma pasada.
+        
+        Returns:
+            Tuple con (prob_masculino, prob_femenino, prediccion, atribuciones)
+        """
+        if self.model_ver != ENSEMBLE_MODEL_VER:
+            # El estudiante destilado no expone atenciones ni gradientes
+            prob_M, prob_F, pred = self._roberta_analysis(description)
+            return prob_M, prob_F, pred, []
+        
+        try:
+            clean_text, char_offsets = model_text_with_offsets(description)
+            enc = self.tokenizer(clean_text, return_offsets_mapping=True, truncation=True,
+                                 max_length=512, return_tensors="pt")
+            token_offsets = [tuple(o) for o in enc.pop("offset_mapping")[0].tolist()]
+            enc = {k: v.to(self.model.device) for k, v in enc.items()}
+            
+            if method == "attention":
+                with torch.no_grad(), eager_attention(self.model):
+                    out = self.model(**enc, output_attentions=True)
+                logits = out.logits[0]
+                scores = attention_rollout(out.attentions)
+            else:
+                # Gradiente × entrada respecto a (logit masculino - logit femenino)
+                embeds = self.model.get_input_embeddings()(enc["input_ids"]).detach().requires_grad_(True)
+                out = self.model(inputs_embeds=embeds, attention_mask=enc["attention_mask"])
+                logits = out.logits[0]
+                # Solo el gradiente de la entrada: backward() llenaría .grad de todos los parámetros
+                grad = torch.autograd.grad(logits[0] - logits[1], embeds)[0]
+                scores = (grad[0] * embeds[0]).sum(dim=-1)
+            
+            # LABEL_0 = masculino, igual que en _roberta_analysis
+            probs = torch.softmax(logits.detach(), dim=-1)
+            prob_M, prob_F = float(probs[0]), float(probs[1])
+            pred = 'M' if prob_M >= prob_F else 'F'
+            
+            # Sin tokens especiales; atención normalizada a suma 1, gradiente a máximo 1
+            scores = [0.0 if start == end else float(v)
+                      for (start, end), v in zip(token_offsets, scores.detach().cpu())]
+            scale = sum(scores) if method == "attention" else max(abs(v) for v in scores)
+            scores = [v / scale for v in scores] if scale else scores
+            
+            return prob_M, prob_F, pred, word_attributions(description, token_offsets, scores, char_offsets)
+        
+        except Exception as e:
+            logger.error(f"Error en explicacion RoBERTa: {e}")
+            return 0.5, 0.5, 'N', []
+    
+    def analyze(self, text: str, explain: bool = False, explain_method: str = "attention",
+                deadline: Optional[Deadline] = None) -> Dict:
         """
         Analiza el sesgo de género en el texto proporcionado
         
         Args:
             text (str): Descripción de la oferta laboral
+            explain (bool): Si es True agrega posiciones de términos léxicos y
+                atribuciones por palabra del score contextual
+            explain_method (str): "attention" (attention rollout) o "gradient" (gradiente × entrada)
+            deadline (Deadline): Plazo de la petición; si RoBERTa no cabe en él (o
+                falla) el resultado es solo léxico con method_used="lexical_degraded"
             
         Returns:
             Dict: Resultados del análisis con scores y predicción final
         """
+        if explain and explain_method not in EXPLAIN_METHODS:
+            raise ValueError(f"explain_method debe ser uno de {EXPLAIN_METHODS}, no {explain_method!r}")
+        
+        # Lematizar una sola vez para el análisis léxico y la detección TIC
+        if explain:
+            lemma_spans = self._lemmatize_spans(text)
+            lemmas = {lemma for lemma, _, _ in lemma_spans}
+        else:
+            lemmas = set(self._lemmatize(text))
+        
         # Análisis léxico
-        masc_hits, fem_hits, lex_score, detected_terms = self._lexical_analysis(text)
+        masc_hits, fem_hits, lex_score, detected_terms = self._lexical_analysis(text, lemmas)
+        
+        # Modo cascada: si el léxico es decisivo se omite RoBERTa
+        skip_roberta = self.cascade.is_decisive(masc_hits, fem_hits, lex_score)
+        
+        contextual, degraded = None, False
+        attributions, contextual_ms = [], 0.0
+        if self.classifier is not None and not skip_roberta:
+            # Análisis RoBERTa, si hay turno en el modelo y cabe en el plazo
+            start = time.perf_counter()
+            if explain:
+                # Turno exclusivo: eager_attention cambia la implementación de atención del modelo compartido
+                prediction = self.inference_gate.run(
+                    lambda: self._roberta_explain(text, explain_method), deadline=deadline, exclusive=True)
+            else:
+                prediction = self.inference_gate.run(lambda: self._roberta_analysis(text), deadline=deadline)
+            contextual_ms = 1000 * (time.perf_counter() - start)
+            # 'N': el modelo falló; mejor solo léxico que un 0.5 presentado como ensemble
+            if prediction is None or prediction[2] == 'N':
+                degraded = True
+            else:
+                prob_M, prob_F, roberta_pred = prediction[:3]
+                attributions = prediction[3] if explain else []
+                contextual = (prob_M, prob_F)
+        
+        result = self._build_result(text, lemmas, (masc_hits, fem_hits, lex_score, detected_terms), contextual,
+                                    degraded)
+        
+        explanation = None
+        if explain:
+            categories = (("masculino", self.masc_terms), ("femenino", self.fem_terms),
+                          ("neutral", self.neutral_terms))
+            explanation = {
+                "method": explain_method if attributions else None,
+                "lexical_spans": [
+                    {"term": lemma, "category": category, "start": start, "end": end,
+                     "contextual_score": overlap_score(start, end, attributions)}
+                    for lemma, start, end in lemma_spans
+                    for category, terms in categories
+                    if lemma in terms
+                ],
+                "contextual_attributions": attributions,
+                "contextual_ms": round(contextual_ms, 2),
+            }
+        result["explanation"] = explanation
+        return result
+    
+    def analyze_batch(self, texts: List[str], batch_size: int = 16,
+                      deadline: Optional[Deadline] = None) -> List[Dict]:
+        """
+        Analiza varios textos a la vez: spaCy y RoBERTa procesan lotes en lugar
+        de un texto por llamada. Devuelve lo mismo que analyze() para cada texto
+        (sin explicación).
+        
+        Args:
+            texts: Descripciones de ofertas laborales
+            batch_size: Tamaño de lote para el modelo contextual
+            deadline: Plazo de la petición; los lotes de RoBERTa que ya no caben
+                en él se resuelven solo con el léxico ("lexical_degraded")
+        """
+        lemma_sets = [set(l) for l in self._lemmatize_many(texts)]
+        lexical = [self._lexical_analysis(t, l) for t, l in zip(texts, lemma_sets)]
         
-        # Análisis RoBERTa
-        prob_M, prob_F, roberta_pred = self._roberta_analysis(text)
+        # Solo los textos no decididos por la cascada pasan por RoBERTa
+        pending = [
+            i for i, (masc_hits, fem_hits, lex_score, _) in enumerate(lexical)
+            if self.classifier is not None and not self.cascade.is_decisive(masc_hits, fem_hits, lex_score)
+        ]
+        contextual, degraded = {}, set()
+        # Un turno del modelo por lote, para que las peticiones individuales no
+        # esperen a que termine un lote grande
+        for chunk_start in range(0, len(pending), batch_size):
+            chunk = pending[chunk_start:chunk_start + batch_size]
+            predictions = self.inference_gate.run(
+                lambda: self._roberta_analysis_batch([texts[i] for i in chunk], batch_size),
+                n_texts=len(chunk), deadline=deadline,
+            )
+            for n, i in enumerate(chunk):
+                if predictions is None or predictions[n][2] == 'N':
+                    degraded.add(i)
+                else:
+                    contextual[i] = predictions[n][:2]
+        
+        results = []
+        for i, text in enumerate(texts):
+            result = self._build_result(text, lemma_sets[i], lexical[i], contextual.get(i), i in degraded)
+            result["explanation"] = None
+            results.append(result)
+        return results
+    
+    def _build_result(self, text: str, lemmas: set, lexical: Tuple[int, int, float, Dict[str, List[str]]],
+                      contextual: Optional[Tuple[float, float]], degraded: bool = False) -> Dict:
+        """
+        Combina el resultado léxico con el contextual (None si RoBERTa no se
+        ejecutó; degraded indica que debía ejecutarse pero no hubo tiempo o falló).
+        """
+        masc_hits, fem_hits, lex_score, detected_terms = lexical
         
         # Decisión final (ensemble simple)
-        if self.classifier is not None:
+        if contextual is not None:
+            prob_M, prob_F = contextual
             # Combinar ambos métodos
-            ensemble_score = 0.4 * lex_score + 0.6 * (prob_M / (prob_M + prob_F))
-            class_pred = 'M' if ensemble_score > 0.5 else 'F'
+            final_score = 0.4 * lex_score + 0.6 * (prob_M / (prob_M + prob_F))
+            class_pred = 'M' if final_score > 0.5 else 'F'
             method_used = "ensemble"
             confidence = max(lex_score, prob_M / (prob_M + prob_F))
         else:
             # Solo léxico
+            prob_M, prob_F = 0.5, 0.5
+            final_score = lex_score
             class_pred = 'M' if lex_score > 0.5 else 'F'
-            method_used = "lexical"
+            if degraded:
+                method_used = DEGRADED_METHOD
+            else:
+                method_used = "lexical_cascade" if self.classifier is not None else "lexical"
             confidence = lex_score
         
         # Calcular score contextual basado en RoBERTa
         contextual_score = prob_M / (prob_M + prob_F) if (prob_M + prob_F) > 0 else 0.5
         
         # Verificar si es oferta TIC
-        is_tic = self.is_tic_offer(text)
+        is_tic = self.is_tic_offer(text, lemmas=lemmas)
         
         return {
             "lexical_score": round(lex_score, 4),
             "contextual_score": round(contextual_score, 4),
-            "final_prediction": round(ensemble_score if self.classifier is not None else lex_score, 4),
+            "final_prediction": round(final_score, 4),
+            "class_pred": class_pred,
             "method_used": method_used,
             "confidence": round(confidence, 4),
             "masculine_hits": masc_hits,
@@ -297,8 +731,61 @@ class AdvancedBiasAnalyzer:
             "is_tic": is_tic
         }
 
-# Inicializar el analizador global
-analyzer = AdvancedBiasAnalyzer()
+def offer_text(title: Optional[str], description: str) -> str:
+    """Texto analizado para una oferta almacenada: título y descripción juntos."""
+    return f"{title}. {description}" if title else description
+
+def prepare_model_text(description: str) -> str:
+    """Limpia el texto tal como lo recibe el modelo contextual (sin URLs ni puntuación, 512 caracteres)."""
+    clean_text = re.sub(r'https?://\S+', '', description)
+    clean_text = re.sub(r'[^\w\s]', ' ', clean_text)
+    return clean_text[:512]  # Limitar longitud
+
+def load_fast_lemmatizer():
+    """Crea un pipeline spaCy mínimo con lematizador por tabla de búsqueda (sin vectores)."""
+    nlp = spacy.blank("es")
+    nlp.add_pipe("lemmatizer", config={"mode": "lookup"})
+    nlp.initialize()
+    return nlp
+
+# Analizador global, creado al primer uso
+_analyzer: Optional[AdvancedBiasAnalyzer] = None
+
+def analyzer_kwargs_from_env() -> Dict:
+    """
+    Argumentos de AdvancedBiasAnalyzer según las variables de entorno del
+    servicio. Los usan el API (get_analyzer) y el proceso por lotes
+    (score_offers.py), para que ambos den el mismo resultado.
+    """
+    # Léxicos alternativos (p. ej. el léxico reducido de las pruebas de carga)
+    paths = {
+        arg: os.environ[var]
+        for arg, var in (("lexicon_path", "LEXICON_PATH"), ("tic_lexicon_path", "TIC_LEXICON_PATH"))
+        if os.getenv(var)
+    }
+    return dict(
+        **paths,
+        lemmatizer_mode=os.getenv("LEMMATIZER_MODE", "full"),
+        cascade=CascadeConfig.from_env(),
+        model_ver=os.getenv("MODEL_VER", ENSEMBLE_MODEL_VER),
+        student_path=os.getenv("STUDENT_MODEL_PATH"),
+        deadlines=DeadlineConfig.from_env(),
+        model_load=ModelLoadConfig.from_env(),
+    )
+
+def get_analyzer() -> AdvancedBiasAnalyzer:
+    """Devuelve el analizador global, inicializándolo la primera vez."""
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = AdvancedBiasAnalyzer(**analyzer_kwargs_from_env())
+    return _analyzer
+
+def __getattr__(name: str):
+    # Mantiene `from gender_bias_analyzer import analyzer` sin cargar los
+    # modelos cuando solo se importa la clase (scripts de evaluación)
+    if name == "analyzer":
+        return get_analyzer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Función de utilidad para testing
 def test_analyzer():
@@ -312,6 +799,7 @@ def test_analyzer():
         "Se requiere un analista técnico con experiencia en desarrollo de software"
     ]
     
+    analyzer = get_analyzer()
     for i, text in enumerate(test_cases, 1):
         print(f"\n--- Test Case {i} ---")
         print(f"Texto: {text}")
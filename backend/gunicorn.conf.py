@@ -0,0 +1,33 @@
+# Configuración de gunicorn (se carga automáticamente desde el directorio de trabajo)
+import os
+
+from runtime_tuning import pin_worker
+
+bind = f"0.0.0.0:{os.getenv('PORT', 8000)}"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", 1))
+
+# Conexiones persistentes: los clientes por lotes reutilizan la conexión en
+# lugar de abrir una por petición. Debe superar el timeout de inactividad del
+# proxy de delante (p. ej. 60 s en muchos balanceadores)
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 75))
+# Margen para la carga de los modelos y para lotes grandes
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+# Reciclar workers cada N peticiones acota el crecimiento de memoria (0 = nunca)
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 0))
+backlog = int(os.getenv("GUNICORN_BACKLOG", 2048))
+
+
+def pre_fork(server, worker):
+    """Asigna a cada worker nuevo el índice libre más bajo (se reutiliza al reemplazar workers)."""
+    used = {getattr(w, "index", None) for w in server.WORKERS.values()}
+    worker.index = next(i for i in range(len(used) + 1) if i not in used)
+
+
+def post_fork(server, worker):
+    """Publica el índice del worker y, si CPU_AFFINITY está activo, lo fija a su bloque de núcleos."""
+    os.environ["WORKER_INDEX"] = str(worker.index)
+    if os.getenv("CPU_AFFINITY", "false").lower() in ("1", "true", "yes"):
+        pin_worker(worker.index, server.num_workers)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compila los léxicos CSV (género y TIC) en un único artefacto binario versionado.
+
+El artefacto guarda los términos ya normalizados por categoría, de modo que el
+analizador puede cargarlo en milisegundos sin pandas ni normalización en el
+arranque. Uso:
+
+    python lexicon_compiler.py [lexicon_definitivo.csv] [lexicon_tic.csv] [-o lexicon.bin]
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import os
+import pickle
+import re
+from typing import Dict, List, Optional
+
+from unidecode import unidecode
+
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Cabecera y versión del formato del artefacto
+MAGIC = b"GBLEX"
+FORMAT_VERSION = 1
+
+# Los identificadores de categoría son el índice en esta tupla
+CATEGORIES = ("masculino", "femenino", "neutral")
+
+DEFAULT_ARTIFACT_PATH = "lexicon.bin"
+
+
+def normalize(txt: str) -> str:
+    """Normaliza texto: minúsculas, sin tildes ni espacios sobrantes."""
+    return unidecode(txt.lower().strip())
+
+
+def _file_digest(path: str) -> str:
+    """Calcula el hash SHA-256 del contenido de un archivo."""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def parse_gender_lexicon(path: str) -> List[List[str]]:
+    """
+    Lee el léxico de género y devuelve los términos normalizados por categoría.
+
+    Returns:
+        Lista indexada por id de categoría (ver CATEGORIES) con los términos ordenados
+    """
+    buckets = [set() for _ in CATEGORIES]
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        reader.fieldnames = [c.strip().lower() for c in reader.fieldnames or []]
+        for row in reader:
+            categoria = (row.get("categoria") or "").replace("\ufeff", "").strip().lower()
+            if categoria not in CATEGORIES:
+                continue
+            base = normalize(row.get("termino_base") or "")
+            variants = [normalize(v) for v in re.split(r"[;,|\t]", row.get("variantes") or "") if v]
+            buckets[CATEGORIES.index(categoria)].update([base, *variants])
+    return [sorted(b) for b in buckets]
+
+
+def parse_tic_lexicon(path: str) -> List[str]:
+    """Lee el léxico TIC (columna 'termino') y devuelve los términos normalizados."""
+    terms = set()
+    with open(path, encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            term = row.get("termino", "").strip().lower()
+            if term:
+                terms.add(normalize(term))
+    return sorted(terms)
+
+
+def compile_lexicon(lexicon_path: str, tic_lexicon_path: str, output_path: str = DEFAULT_ARTIFACT_PATH) -> Dict:
+    """
+    Compila ambos léxicos y escribe el artefacto binario.
+
+    Args:
+        lexicon_path: Ruta al CSV del léxico de género
+        tic_lexicon_path: Ruta al CSV del léxico TIC
+        output_path: Ruta del artefacto de salida
+
+    Returns:
+        Diccionario con el contenido compilado
+    """
+    payload = {
+        "categories": list(CATEGORIES),
+        "terms": parse_gender_lexicon(lexicon_path),
+        "tic_terms": parse_tic_lexicon(tic_lexicon_path),
+        "sources": {
+            "lexicon": _file_digest(lexicon_path),
+            "tic": _file_digest(tic_lexicon_path),
+        },
+    }
+
+    buf = io.BytesIO()
+    buf.write(MAGIC)
+    buf.write(FORMAT_VERSION.to_bytes(2, "little"))
+    pickle.dump(payload, buf, protocol=pickle.HIGHEST_PROTOCOL)
+
+    # Escritura atómica para que los workers nunca lean un archivo a medias
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(buf.getvalue())
+    os.replace(tmp_path, output_path)
+
+    logger.info(f"Artefacto de lexico escrito en {output_path}: "
+                f"{', '.join(f'{c}={len(t)}' for c, t in zip(CATEGORIES, payload['terms']))}, "
+                f"tic={len(payload['tic_terms'])}")
+    return payload
+
+
+def load_compiled_lexicon(artifact_path: str, lexicon_path: Optional[str] = None,
+                          tic_lexicon_path: Optional[str] = None) -> Optional[Dict]:
+    """
+    Carga el artefacto compilado si existe y está al día con los CSV de origen.
+
+    Returns:
+        Diccionario con el contenido compilado, o None si falta, tiene otra
+        versión de formato o los CSV cambiaron desde la compilación
+    """
+    if not os.path.exists(artifact_path):
+        return None
+
+    with open(artifact_path, "rb") as f:
+        header = f.read(len(MAGIC) + 2)
+        if header[:len(MAGIC)] != MAGIC:
+            logger.warning(f"{artifact_path} no es un artefacto de lexico valido")
+            return None
+        version = int.from_bytes(header[len(MAGIC):], "little")
+        if version != FORMAT_VERSION:
+            logger.warning(f"Artefacto de lexico con formato {version}, se esperaba {FORMAT_VERSION}")
+            return None
+        payload = pickle.load(f)
+
+    sources = payload.get("sources", {})
+    for key, path in (("lexicon", lexicon_path), ("tic", tic_lexicon_path)):
+        if path and os.path.exists(path) and sources.get(key) != _file_digest(path):
+            logger.warning(f"Artefacto de lexico desactualizado respecto a {path}")
+            return None
+
+    return payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compila los léxicos CSV en un artefacto binario")
+    parser.add_argument("lexicon", nargs="?", default="lexicon_definitivo.csv",
+                        help="CSV del léxico de género")
+    parser.add_argument("tic_lexicon", nargs="?", default="lexicon_tic.csv",
+                        help="CSV del léxico TIC")
+    parser.add_argument("-o", "--output", default=DEFAULT_ARTIFACT_PATH,
+                        help="Ruta del artefacto de salida")
+    args = parser.parse_args()
+
+    compile_lexicon(args.lexicon, args.tic_lexicon, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas de carga reproducibles del servicio, sin red ni descargas de modelos.
+
+Levanta gunicorn con main:app usando un clasificador RoBERTa diminuto con
+pesos aleatorios (creado en un directorio temporal) y el léxico reducido de
+loadtest/, ejecuta los escenarios contra /api/analyze y /api/analyze/batch
+(ver load_test.py) mientras mide la memoria de los workers, y compara el
+resultado con la línea base guardada. Termina con código 1 si hay regresión.
+
+    python load_harness.py                          # comparar con loadtest/baseline.json
+    python load_harness.py --rps 40 --concurrency 16 --workers 2
+    python load_harness.py --update-baseline        # guardar la ejecución como línea base
+
+La línea base depende de la máquina: debe generarse en la misma donde se
+compara (p. ej. el runner de CI).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from compare_lemmatizers import load_corpus
+from load_test import run_load
+
+import logging
+logger = logging.getLogger(__name__)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(HERE, "loadtest")
+DEFAULT_BASELINE = os.path.join(FIXTURES_DIR, "baseline.json")
+SCENARIOS = ("analyze", "batch")
+
+# Tolerancias relativas frente a la línea base
+DEFAULT_TOLERANCES = {
+    "throughput": 0.20,   # ofertas/s hasta un 20% por debajo
+    "latency": 0.30,      # p95 hasta un 30% por encima
+    "memory": 0.20,       # RSS máximo por worker hasta un 20% por encima
+    "error_rate": 0.01,   # tasa de errores hasta 1 punto por encima
+    "degraded_rate": 0.01,  # ofertas resueltas solo con el léxico (plazo agotado) hasta 1 punto por encima
+}
+
+
+def build_stand_in_model(path: str, texts: List[str], seed: int = 0) -> str:
+    """
+    Crea un clasificador RoBERTa diminuto con pesos aleatorios y un tokenizador
+    BPE entrenado sobre el corpus: misma interfaz que el modelo real, sin descargas.
+    """
+    import torch
+    from tokenizers import ByteLevelBPETokenizer
+    from tokenizers.processors import RobertaProcessing
+    from transformers import PreTrainedTokenizerFast, RobertaConfig, RobertaForSequenceClassification
+
+    specials = ["<s>", "<pad>", "</s>", "<unk>", "<mask>"]
+    bpe = ByteLevelBPETokenizer()
+    bpe.train_from_iterator(texts, vocab_size=1000, special_tokens=specials, show_progress=False)
+    bpe.post_processor = RobertaProcessing(("</s>", bpe.token_to_id("</s>")), ("<s>", bpe.token_to_id("<s>")))
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=bpe._tokenizer, bos_token="<s>", eos_token="</s>", cls_token="<s>", sep_token="</s>",
+        unk_token="<unk>", pad_token="<pad>", mask_token="<mask>", model_max_length=512,
+    )
+    tokenizer.save_pretrained(path)
+
+    torch.manual_seed(seed)
+    config = RobertaConfig(
+        vocab_size=len(tokenizer), hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+        intermediate_size=64, max_position_embeddings=514, pad_token_id=tokenizer.pad_token_id, num_labels=2,
+    )
+    RobertaForSequenceClassification(config).save_pretrained(path)
+    return path
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _child_pids(pid: int) -> List[int]:
+    """Procesos hijos de pid (los workers de gunicorn), leídos de /proc."""
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # El nombre del proceso va entre paréntesis y puede contener espacios
+                fields = f.read().rsplit(")", 1)[1].split()
+            if int(fields[1]) == pid:
+                children.append(int(entry))
+        except (OSError, IndexError):
+            continue
+    return children
+
+
+def _rss_mb(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+class MemorySampler(threading.Thread):
+    """Muestrea periódicamente la memoria residente (RSS) de cada worker."""
+
+    def __init__(self, master_pid: int, interval: float = 0.5):
+        super().__init__(daemon=True)
+        self.master_pid = master_pid
+        self.interval = interval
+        self.samples: List[Dict] = []
+        self._done = threading.Event()
+        self._t0 = time.perf_counter()
+
+    def run(self):
+        if not os.path.isdir("/proc"):
+            logger.warning("Sin /proc: no se mide la memoria de los workers")
+            return
+        while not self._done.is_set():
+            rss = {pid: _rss_mb(pid) for pid in _child_pids(self.master_pid)}
+            self.samples.append({
+                "t": round(time.perf_counter() - self._t0, 1),
+                "workers_rss_mb": sorted(round(v, 1) for v in rss.values() if v is not None),
+            })
+            self._done.wait(self.interval)
+
+    def stop(self) -> Dict:
+        self._done.set()
+        self.join()
+        per_sample = [max(s["workers_rss_mb"]) for s in self.samples if s["workers_rss_mb"]]
+        return {
+            "peak_worker_rss_mb": max(per_sample) if per_sample else None,
+            "start_worker_rss_mb": per_sample[0] if per_sample else None,
+            "end_worker_rss_mb": per_sample[-1] if per_sample else None,
+            "samples": self.samples,
+        }
+
+
+def start_server(model_dir: str, port: int, workers: int, log_path: str, extra_env: Optional[Dict] = None,
+                 startup_timeout: float = 180) -> subprocess.Popen:
+    """Arranca gunicorn con el modelo sustituto y espera a que /health responda (log en log_path)."""
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        WEB_CONCURRENCY=str(workers),
+        ROBERTA_MODEL=model_dir,
+        LEXICON_PATH=os.path.join(FIXTURES_DIR, "lexicon.csv"),
+        TIC_LEXICON_PATH=os.path.join(FIXTURES_DIR, "lexicon_tic.csv"),
+        LEMMATIZER_MODE="fast",
+        HF_HUB_OFFLINE="1",
+        **(extra_env or {}),
+    )
+    with open(log_path, "wb") as log:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "main:app", "--config", "gunicorn.conf.py"],
+            cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=log,
+        )
+    deadline = time.time() + startup_timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            with open(log_path, encoding="utf-8", errors="replace") as f:
+                raise SystemExit(f"El servidor terminó al arrancar:\n{f.read()[-2000:]}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=2).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    server.terminate()
+    raise SystemExit(f"El servidor no respondió en {startup_timeout:.0f}s")
+
+
+def compare_with_baseline(report: Dict, baseline: Dict, tolerances: Dict) -> List[str]:
+    """Lista de regresiones de report frente a baseline (vacía si no hay)."""
+    regressions = []
+    for name, current in report["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        if current["offers_per_s"] < base["offers_per_s"] * (1 - tolerances["throughput"]):
+            regressions.append(f"{name}: throughput {current['offers_per_s']} ofertas/s "
+                               f"(línea base {base['offers_per_s']})")
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerances["latency"]):
+            regressions.append(f"{name}: p95 {current['p95_ms']} ms (línea base {base['p95_ms']})")
+        if current["error_rate"] > base["error_rate"] + tolerances["error_rate"]:
+            regressions.append(f"{name}: tasa de errores {current['error_rate']} (línea base {base['error_rate']})")
+        # Las líneas base anteriores a degraded_rate se midieron sin degradación
+        base_degraded = base.get("degraded_rate", 0.0)
+        if current["degraded_rate"] > base_degraded + tolerances["degraded_rate"]:
+            regressions.append(f"{name}: ofertas degradadas {current['degraded_rate']} (línea base {base_degraded})")
+
+    peak, base_peak = report["memory"]["peak_worker_rss_mb"], baseline.get("memory", {}).get("peak_worker_rss_mb")
+    if peak and base_peak and peak > base_peak * (1 + tolerances["memory"]):
+        regressions.append(f"memoria: pico por worker {peak:.0f} MB (línea base {base_peak:.0f} MB)")
+    return regressions
+
+
+def _median_report(rounds: List[Dict]) -> Dict:
+    """Mediana de cada métrica numérica entre rondas (un p95 aislado es muy ruidoso)."""
+    report = dict(rounds[0], rounds=len(rounds))
+    for key, value in rounds[0].items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            report[key] = statistics.median(r[key] for r in rounds)
+    return report
+
+
+def run_harness(args) -> Dict:
+    texts = load_corpus(args.corpus)
+    port = _free_port()
+    with tempfile.TemporaryDirectory(prefix="stand_in_model_") as model_dir:
+        logger.info(f"Creando modelo sustituto en {model_dir}...")
+        build_stand_in_model(model_dir, texts)
+        server = start_server(model_dir, port, args.workers, os.path.join(model_dir, "server.log"))
+        sampler = MemorySampler(server.pid)
+        sampler.start()
+        try:
+            url = f"http://127.0.0.1:{port}"
+            scenarios = {}
+            for name in args.scenarios:
+                # Calentamiento: que todos los workers hayan cargado y ejecutado el modelo
+                asyncio.run(run_load(url, texts, name, requests=2 * args.workers, concurrency=args.workers,
+                                     batch_size=args.batch_size))
+                rounds = []
+                for _ in range(args.repeat):
+                    rounds.append(asyncio.run(run_load(
+                        url, texts, name, requests=args.requests, concurrency=args.concurrency,
+                        batch_size=args.batch_size, rps=args.rps,
+                    )))
+                    logger.info(f"{name}: {json.dumps(rounds[-1])}")
+                scenarios[name] = _median_report(rounds)
+        finally:
+            memory = sampler.stop()
+            server.terminate()
+            server.wait(timeout=30)
+
+    return {
+        "config": {
+            "workers": args.workers, "concurrency": args.concurrency, "requests": args.requests,
+            "rps": args.rps, "repeat": args.repeat, "batch_size": args.batch_size, "corpus": os.path.basename(args.corpus),
+        },
+        "scenarios": scenarios,
+        "memory": memory,
+    }
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Prueba de carga con modelo sustituto y comparación con línea base")
+    parser.add_argument("--corpus", default=os.path.join(HERE, "sample_offers.csv"))
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--workers", type=int, default=1, help="Workers de gunicorn")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clientes simultáneos")
+    parser.add_argument("--requests", type=int, default=300, help="Peticiones por escenario")
+    parser.add_argument("--rps", type=float, help="Peticiones por segundo (por defecto, sin límite)")
+    parser.add_argument("--repeat", type=int, default=3, help="Rondas por escenario; se reporta la mediana")
+    parser.add_argument("--batch-size", type=int, default=16, help="Descripciones por petición en el escenario batch")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="Guardar esta ejecución como línea base")
+    parser.add_argument("--report", help="Guardar el reporte completo (JSON) en este archivo")
+    for name, value in DEFAULT_TOLERANCES.items():
+        parser.add_argument(f"--tolerance-{name.replace('_', '-')}", type=float, default=value)
+    args = parser.parse_args()
+
+    report = run_harness(args)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    summary = {name: {k: m[k] for k in ("offers_per_s", "p50_ms", "p95_ms", "p99_ms", "error_rate", "degraded_rate")}
+               for name, m in report["scenarios"].items()}
+    summary["peak_worker_rss_mb"] = report["memory"]["peak_worker_rss_mb"]
+    print(json.dumps(summary, indent=2))
+
+    if args.update_baseline:
+        baseline = dict(report, memory={k: v for k, v in report["memory"].items() if k != "samples"})
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        logger.info(f"Linea base guardada en {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        logger.warning(f"No hay linea base en {args.baseline}: ejecute con --update-baseline")
+        return
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("config") != report["config"]:
+        logger.warning("La configuracion difiere de la linea base; la comparacion puede no ser valida")
+
+    tolerances = {name: getattr(args, f"tolerance_{name}") for name in DEFAULT_TOLERANCES}
+    regressions = compare_with_baseline(report, baseline, tolerances)
+    if regressions:
+        for regression in regressions:
+            logger.error(f"Regresion: {regression}")
+        sys.exit(1)
+    logger.info("Sin regresiones respecto a la linea base")
+
+
+if __name__ == "__main__":
+    main()
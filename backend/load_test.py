@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de carga del API contra un servidor en ejecución: envía peticiones
+concurrentes a /api/analyze o /api/analyze/batch y reporta throughput,
+latencias, bytes recibidos y la fracción de ofertas resueltas solo con el
+léxico por falta de plazo (degraded_rate: un 200 degradado no cuenta como
+error, pero tampoco es una mejora de throughput). Uso:
+
+    python load_test.py --url http://127.0.0.1:8000 --requests 200 --concurrency 8
+    python load_test.py --endpoint batch --batch-size 32 --encoding gzip
+    python load_test.py --endpoint batch --compare   # compresión × keep-alive
+    python load_test.py --rps 50 --requests 500      # ritmo fijo de llegada
+
+Para levantar el servicio con un modelo sustituto y comparar con una línea
+base, ver load_harness.py.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from compare_lemmatizers import load_corpus
+from deadlines import DEGRADED_METHOD
+
+ENCODINGS = ("identity", "gzip", "br")
+
+# Una línea de log por petición distorsiona la medición
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def run_load(url: str, texts: List[str], endpoint: str = "analyze", requests: int = 200,
+                   concurrency: int = 8, batch_size: int = 16, encoding: str = "identity",
+                   keepalive: bool = True, rps: Optional[float] = None) -> Dict:
+    """
+    Envía `requests` peticiones con `concurrency` clientes simultáneos.
+
+    Sin `rps`, cada cliente envía la siguiente petición al recibir la
+    respuesta anterior. Con `rps`, la petición i se programa en el instante
+    i/rps y su latencia se mide desde ese instante, de modo que el tiempo
+    esperando un cliente libre también cuenta cuando el servidor no da abasto.
+
+    Returns:
+        Métricas agregadas (peticiones/s, ofertas/s, latencias, errores,
+        ofertas degradadas y bytes)
+    """
+    path = "/api/analyze" if endpoint == "analyze" else "/api/analyze/batch"
+    corpus = itertools.cycle(texts)
+    if endpoint == "analyze":
+        payloads = [{"description": next(corpus)} for _ in range(requests)]
+    else:
+        payloads = [{"descriptions": [next(corpus) for _ in range(batch_size)]} for _ in range(requests)]
+
+    # Sin keep-alive cada petición abre (y cierra) su propia conexión
+    limits = httpx.Limits(max_connections=concurrency,
+                          max_keepalive_connections=concurrency if keepalive else 0)
+    latencies, errors, degraded = [], 0, 0
+    wire_bytes, body_bytes = 0, 0
+    queue = iter(enumerate(payloads))
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120,
+                                 headers={"Accept-Encoding": encoding}) as client:
+        async def worker():
+            nonlocal errors, degraded, wire_bytes, body_bytes
+            for i, payload in queue:
+                start = time.perf_counter()
+                if rps:
+                    scheduled = t0 + i / rps
+                    if scheduled > start:
+                        await asyncio.sleep(scheduled - start)
+                    start = scheduled
+                try:
+                    response = await client.post(path, json=payload)
+                    body = response.content
+                    if response.status_code != 200:
+                        errors += 1
+                        continue
+                    latencies.append(1000 * (time.perf_counter() - start))
+                    data = json.loads(body)
+                    results = [data] if endpoint == "analyze" else data["results"]
+                    degraded += sum(r.get("method_used") == DEGRADED_METHOD for r in results)
+                    wire_bytes += response.num_bytes_downloaded
+                    body_bytes += len(body)
+                except httpx.HTTPError:
+                    errors += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    ok = len(latencies)
+    offers = ok * (1 if endpoint == "analyze" else batch_size)
+    return {
+        "endpoint": endpoint,
+        "encoding": encoding,
+        "keepalive": keepalive,
+        "requests": requests,
+        "target_rps": rps,
+        "errors": errors,
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+        "degraded": degraded,
+        "degraded_rate": round(degraded / offers, 4) if offers else 0.0,
+        "requests_per_s": round(ok / elapsed, 1),
+        "offers_per_s": round(offers / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 0.50), 1),
+        "p95_ms": round(_percentile(latencies, 0.95), 1),
+        "p99_ms": round(_percentile(latencies, 0.99), 1),
+        "bytes_per_response": round(wire_bytes / ok) if ok else 0,
+        "compression_ratio": round(body_bytes / wire_bytes, 2) if wire_bytes else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de /api/analyze y /api/analyze/batch")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--corpus", default="sample_offers.csv")
+    parser.add_argument("--endpoint", choices=("analyze", "batch"), default="analyze")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rps", type=float, help="Peticiones por segundo (por defecto, tan rápido como se pueda)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--encoding", choices=ENCODINGS, default="identity", help="Accept-Encoding del cliente")
+    parser.add_argument("--no-keepalive", action="store_true", help="Abrir una conexión por petición")
+    parser.add_argument("--compare", action="store_true",
+                        help="Medir todas las combinaciones de compresión y keep-alive")
+    args = parser.parse_args()
+
+    texts = load_corpus(args.corpus)
+    if args.compare:
+        combos = [(enc, ka) for ka in (False, True) for enc in ENCODINGS]
+    else:
+        combos = [(args.encoding, not args.no_keepalive)]
+    for encoding, keepalive in combos:
+        report = asyncio.run(run_load(args.url, texts, args.endpoint, args.requests, args.concurrency,
+                                      args.batch_size, encoding, keepalive, args.rps))
+        print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,50 @@
-from fastapi import FastAPI, HTTPException, Request
+import asyncio
+import os
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Dict, List
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional
+from deadlines import Deadline
 from gender_bias_analyzer import analyzer
 
+# Serialización JSON con orjson si está instalado
+try:
+    import orjson  # noqa: F401
+    DefaultResponse = ORJSONResponse
+except ImportError:
+    DefaultResponse = JSONResponse
+
+# Compresión de respuestas: "off", "gzip" o "brotli" (con gzip para clientes sin br).
+# Solo se comprimen respuestas de al menos COMPRESSION_MIN_SIZE bytes (lotes, explicaciones)
+RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "gzip").lower()
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+# Máximo de descripciones por petición a /api/analyze/batch
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", 64))
+# Cabecera con la que un cliente puede acortar el plazo de su petición (ms)
+DEADLINE_HEADER = "X-Request-Deadline-Ms"
+# Cada cuánto se comprueba si el cliente sigue conectado (s)
+DISCONNECT_POLL_S = 0.1
+
 app = FastAPI(
     title="Analizador de Sesgo de Género",
     description="API para analizar sesgo de género en ofertas laborales usando análisis lexical y modelo RoBERTa",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=DefaultResponse
 )
 
+if RESPONSE_COMPRESSION == "brotli":
+    try:
+        from brotli_asgi import BrotliMiddleware
+        app.add_middleware(BrotliMiddleware, minimum_size=COMPRESSION_MIN_SIZE, gzip_fallback=True)
+    except ImportError:
+        print("⚠️ brotli-asgi no instalado: se usa gzip")
+        RESPONSE_COMPRESSION = "gzip"
+if RESPONSE_COMPRESSION == "gzip":
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
 # Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -24,12 +59,35 @@ app.add_middleware(
 
 # Endpoint manual para manejar preflight de CORS
 @app.options("/api/analyze")
+@app.options("/api/analyze/batch")
 async def preflight_analyze(request: Request):
     return {}
 
 # Modelo para la request
 class AnalysisRequest(BaseModel):
     description: str
+    explain: bool = False
+    explain_method: Literal["attention", "gradient"] = "attention"
+
+# Modelos para la explicación opcional (offsets de caracteres en la descripción)
+class LexicalSpan(BaseModel):
+    term: str
+    category: str
+    start: Optional[int]
+    end: Optional[int]
+    contextual_score: Optional[float]
+
+class TokenAttribution(BaseModel):
+    text: str
+    start: int
+    end: int
+    score: float
+
+class Explanation(BaseModel):
+    method: Optional[str]
+    lexical_spans: List[LexicalSpan]
+    contextual_attributions: List[TokenAttribution]
+    contextual_ms: float
 
 # Modelo para la response
 class AnalysisResponse(BaseModel):
@@ -43,6 +101,42 @@ class AnalysisResponse(BaseModel):
     detected_terms: Dict[str, List[str]]
     roberta_probabilities: Dict[str, float]
     is_tic: bool
+    explanation: Optional[Explanation] = None
+
+# Análisis de varias descripciones en una sola petición
+class BatchAnalysisRequest(BaseModel):
+    descriptions: List[str] = Field(..., min_length=1)
+
+class BatchAnalysisResponse(BaseModel):
+    results: List[AnalysisResponse]
+
+def request_deadline(http_request: Request, default_ms: float) -> Deadline:
+    """Plazo de la petición: el del servidor, o el de la cabecera si es menor."""
+    timeout_ms = default_ms
+    header = http_request.headers.get(DEADLINE_HEADER)
+    if header:
+        try:
+            requested = float(header)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"{DEADLINE_HEADER} debe ser un número de milisegundos")
+        if requested <= 0:
+            raise HTTPException(status_code=400, detail=f"{DEADLINE_HEADER} debe ser positivo")
+        timeout_ms = min(timeout_ms, requested) if timeout_ms else requested
+    return Deadline(timeout_ms)
+
+async def run_analysis(http_request: Request, deadline: Deadline, fn, *args, **kwargs):
+    """
+    Ejecuta el análisis en el pool de hilos, sin bloquear el event loop, y
+    cancela el plazo si el cliente se desconecta: el análisis en curso se
+    resuelve entonces sin esperar ni ejecutar el modelo contextual.
+    """
+    task = asyncio.ensure_future(run_in_threadpool(fn, *args, deadline=deadline, **kwargs))
+    while not task.done():
+        await asyncio.wait({task}, timeout=DISCONNECT_POLL_S)
+        if not task.done() and await http_request.is_disconnected():
+            deadline.cancel()
+            break
+    return await task
 
 @app.get("/")
 async def root():
@@ -71,30 +165,42 @@ async def get_lexicon_stats():
     }
 
 @app.post("/api/analyze", response_model=AnalysisResponse)
-async def analyze_gender_bias(request: AnalysisRequest):
+async def analyze_gender_bias(request: AnalysisRequest, http_request: Request):
     try:
         print("🔍 Recibida descripción:", request.description)
 
         if not request.description.strip():
             raise HTTPException(status_code=400, detail="La descripción no puede estar vacía")
 
-        results = analyzer.analyze(request.description)
+        deadline = request_deadline(http_request, analyzer.deadlines.analyze_ms)
+        results = await run_analysis(
+            http_request, deadline, analyzer.analyze,
+            request.description,
+            explain=request.explain,
+            explain_method=request.explain_method
+        )
 
         print("✅ Resultado del análisis:", results)
 
-        return AnalysisResponse(
-            lexical_score=results["lexical_score"],
-            contextual_score=results["contextual_score"],
-            final_prediction=results["final_prediction"],
-            method_used=results["method_used"],
-            confidence=results["confidence"],
-            masculine_hits=results["masculine_hits"],
-            feminine_hits=results["feminine_hits"],
-            detected_terms=results["detected_terms"],
-            roberta_probabilities=results["roberta_probabilities"],
-            is_tic=results["is_tic"]
-        )
+        # response_model valida y filtra el resultado en una sola pasada
+        return results
 
+    except HTTPException:
+        raise
+    except Exception as e:
+        print("❌ Error interno:", str(e))
+        raise HTTPException(status_code=500, detail=f"Error en el análisis: {str(e)}")
+
+@app.post("/api/analyze/batch", response_model=BatchAnalysisResponse)
+async def analyze_gender_bias_batch(request: BatchAnalysisRequest, http_request: Request):
+    if len(request.descriptions) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Máximo {MAX_BATCH_SIZE} descripciones por petición")
+    if any(not d.strip() for d in request.descriptions):
+        raise HTTPException(status_code=400, detail="Las descripciones no pueden estar vacías")
+
+    deadline = request_deadline(http_request, analyzer.deadlines.batch_ms)
+    try:
+        return {"results": await run_analysis(http_request, deadline, analyzer.analyze_batch, request.descriptions)}
     except Exception as e:
         print("❌ Error interno:", str(e))
         raise HTTPException(status_code=500, detail=f"Error en el análisis: {str(e)}")
@@ -102,17 +208,74 @@ async def analyze_gender_bias(request: AnalysisRequest):
 @app.get("/api/analyzer/info")
 async def get_analyzer_info():
     return {
-        "model_version": "v2.0_ensemble",
+        "model_version": analyzer.model_ver,
         "features": {
             "lexical_analysis": True,
             "contextual_analysis": analyzer.classifier is not None,
             "ensemble_method": analyzer.classifier is not None,
-            "spacy_model": "es_core_news_md",
-            "roberta_model": "PlanTL-GOB-ES/roberta-base-bne" if analyzer.classifier else None
+            "spacy_model": "es_core_news_md" if analyzer.lemmatizer_mode == "full" else "es_lookup_lemmatizer",
+            "lemmatizer_mode": analyzer.lemmatizer_mode,
+            "cascade": vars(analyzer.cascade),
+            "threads": analyzer.thread_settings,
+            "deadlines": vars(analyzer.deadlines),
+            "roberta_model": analyzer.contextual_model_name if analyzer.classifier else None,
+            "model_load": analyzer.model_load_report
         },
         "lexicon_info": {
             "masculine_terms": len(analyzer.masc_terms),
             "feminine_terms": len(analyzer.fem_terms),
             "neutral_terms": len(analyzer.neutral_terms)
-        }
+        },
+        "cache_stats": analyzer.cache_stats(),
+        "inference_queue": analyzer.inference_gate.stats()
     }
+
+# Analítica del Dashboard: se sirve desde las tablas de agregados que
+# PostgresStorage mantiene al guardar evaluaciones (requiere DB_URL). El API
+# solo consulta: las tablas las crea score_offers.py (o roberta.py)
+_storage = None
+_storage_ready = False
+
+def get_storage():
+    global _storage, _storage_ready
+    if _storage is None:
+        db_url = os.getenv("DB_URL")
+        if not db_url:
+            raise HTTPException(status_code=503, detail="Analítica no disponible: DB_URL no está configurada")
+        from storage import PostgresStorage
+        _storage = PostgresStorage(db_url, migrate=False)
+    if not _storage_ready:
+        # Se comprueba hasta que existan; después ya no se vuelve a consultar el esquema
+        missing = _storage.missing_aggregate_tables()
+        if missing:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Analítica no disponible: faltan las tablas {', '.join(missing)} "
+                       "(ejecute python score_offers.py --db <DB_URL> --migrate-only)",
+            )
+        _storage_ready = True
+    return _storage
+
+@app.get("/api/analytics/summary")
+def get_analytics_summary(model_ver: Optional[str] = None):
+    """Total de ofertas evaluadas, conteos M/F y desglose TIC / no TIC."""
+    return get_storage().summary(model_ver)
+
+@app.get("/api/analytics/distribution")
+def get_analytics_distribution(model_ver: Optional[str] = None):
+    """Distribución del score final en tramos de 0.1."""
+    return {"buckets": get_storage().score_distribution(model_ver)}
+
+@app.get("/api/analytics/terms")
+def get_analytics_terms(model_ver: Optional[str] = None,
+                        category: Optional[Literal["masculino", "femenino", "neutral"]] = None,
+                        limit: int = Query(20, ge=1, le=200)):
+    """Términos del lexicon detectados con más frecuencia."""
+    return {"terms": get_storage().top_terms(model_ver, category, limit)}
+
+@app.get("/api/analytics/timeseries")
+def get_analytics_timeseries(model_ver: Optional[str] = None,
+                             granularity: Literal["day", "week", "month"] = "day",
+                             days: Optional[int] = Query(None, ge=1)):
+    """Evaluaciones por periodo de evaluated_at."""
+    return {"granularity": granularity, "series": get_storage().time_series(model_ver, granularity, days)}
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Carga del modelo contextual con poca memoria.
+
+La carga clásica de from_pretrained instancia el modelo en float32, lee el
+checkpoint completo en el heap del proceso y después copia los pesos, de
+modo que el pico de RSS llega a duplicar el tamaño del modelo. Aquí se
+prefieren checkpoints safetensors, que se leen por memory-map tensor a
+tensor, con el modelo creado sin pesos iniciales (low_cpu_mem_usage), y
+opcionalmente se usan pesos en bfloat16 o float16, que ocupan la mitad.
+Cada carga informa su duración y la memoria residente.
+
+Si el checkpoint ya tiene la precisión pedida, los pesos pueden quedar
+mapeados desde el archivo (RSS compartido entre workers, en la caché de
+páginas) en lugar de copiarse al heap de cada proceso. Convertir la
+precisión al cargar obliga a copiarlos y eleva el pico de memoria; por
+eso conviene exportar una vez el checkpoint en la precisión de servicio.
+
+Variables de entorno (ver ModelLoadConfig.from_env):
+    MODEL_DTYPE          float32 (por defecto), bfloat16, float16 o auto (la del checkpoint)
+    MODEL_LOW_MEMORY     "false" para la carga clásica
+
+Para convertir un checkpoint (p. ej. pytorch_model.bin en float32) a
+safetensors en bfloat16 y cargarlo después con ROBERTA_MODEL=<directorio>
+y MODEL_DTYPE=bfloat16 (o auto):
+
+    python model_loading.py --model PlanTL-GOB-ES/roberta-base-bne --dtype bfloat16 --export modelo_bf16
+    python model_loading.py --model modelo_bf16 --dtype bfloat16      # solo medir la carga
+    python model_loading.py --model PlanTL-GOB-ES/roberta-base-bne --dtype bfloat16 --agreement sample_offers.csv
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import torch
+import transformers
+from packaging import version
+from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer
+
+import logging
+logger = logging.getLogger(__name__)
+
+DTYPES = {"float32": torch.float32, "bfloat16": torch.bfloat16, "float16": torch.float16, "auto": "auto"}
+
+_TRANSFORMERS_VERSION = version.parse(transformers.__version__)
+# transformers 4.56 renombró torch_dtype a dtype; desde la 5 la carga sin
+# pesos iniciales es la única y low_cpu_mem_usage ya no se acepta
+_DTYPE_KWARG = "dtype" if _TRANSFORMERS_VERSION >= version.parse("4.56") else "torch_dtype"
+_HAS_LOW_CPU_MEM_USAGE = _TRANSFORMERS_VERSION < version.parse("5")
+# Antes de la 4.42 el pipeline text-classification pasa los logits a numpy sin
+# convertirlos a float, y numpy no admite bfloat16: cada predicción fallaría
+_PIPELINE_SUPPORTS_BF16 = _TRANSFORMERS_VERSION >= version.parse("4.42")
+
+
+@dataclass
+class ModelLoadConfig:
+    """Precisión de los pesos y modo de carga del modelo contextual."""
+    dtype: str = "float32"
+    low_memory: bool = True
+
+    def __post_init__(self):
+        if self.dtype not in DTYPES:
+            raise ValueError(f"dtype debe ser uno de {tuple(DTYPES)}, no {self.dtype!r}")
+
+    @classmethod
+    def from_env(cls) -> "ModelLoadConfig":
+        """Lee la configuración de las variables MODEL_DTYPE y MODEL_LOW_MEMORY."""
+        return cls(
+            dtype=os.getenv("MODEL_DTYPE", cls.dtype).lower(),
+            low_memory=os.getenv("MODEL_LOW_MEMORY", "true").lower() in ("1", "true", "yes"),
+        )
+
+    def from_pretrained_kwargs(self) -> Dict:
+        """Argumentos de from_pretrained para esta configuración."""
+        kwargs = {_DTYPE_KWARG: DTYPES[self.dtype]}
+        # from_pretrained usa model.safetensors si existe; no se exige porque
+        # algunos modelos del Hub solo publican pytorch_model.bin
+        if self.low_memory:
+            if _HAS_LOW_CPU_MEM_USAGE:
+                kwargs["low_cpu_mem_usage"] = True
+        elif not _HAS_LOW_CPU_MEM_USAGE:
+            logger.warning("transformers >= 5 siempre carga sin pesos iniciales; MODEL_LOW_MEMORY=false no tiene efecto")
+        return kwargs
+
+
+def rss_mb(field: str = "VmRSS") -> Optional[float]:
+    """
+    Memoria residente actual del proceso en MB (None fuera de Linux).
+    field="RssAnon" da solo la memoria privada del proceso, sin las páginas
+    de archivos mapeados que comparten los workers.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        return None
+    return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pico de memoria residente del proceso desde que arrancó, en MB (None en Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def checkpoint_dtype(model_name: str) -> Optional[str]:
+    """Precisión con la que se guardó el checkpoint, según su config.json (None si no consta)."""
+    try:
+        config = AutoConfig.from_pretrained(model_name)
+    except Exception:
+        return None
+    dtype = getattr(config, "dtype", None) or getattr(config, "torch_dtype", None)
+    return str(dtype).replace("torch.", "") if dtype else None
+
+
+def load_sequence_classifier(model_name: str, config: Optional[ModelLoadConfig] = None,
+                             **kwargs) -> Tuple[torch.nn.Module, Dict]:
+    """
+    Carga un modelo de clasificación de secuencias según `config`.
+
+    Returns:
+        (modelo en modo evaluación, reporte con segundos de carga, RSS antes y
+        después, pico de RSS, dtype y MB de pesos)
+    """
+    config = config or ModelLoadConfig()
+    stored = checkpoint_dtype(model_name)
+    if (stored if config.dtype == "auto" else config.dtype) == "bfloat16" and not _PIPELINE_SUPPORTS_BF16:
+        raise ValueError(f"Los pesos en bfloat16 requieren transformers >= 4.42 (instalada {transformers.__version__}); "
+                         "actualice transformers o use MODEL_DTYPE=float32 o float16")
+    if config.dtype != "auto" and stored and stored != config.dtype:
+        logger.warning(f"El checkpoint está en {stored}: convertirlo a {config.dtype} copia los pesos en la "
+                       f"memoria del proceso (exporte el modelo con model_loading.py --export para evitarlo)")
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    model = AutoModelForSequenceClassification.from_pretrained(
+        model_name, **config.from_pretrained_kwargs(), **kwargs
+    )
+    model.eval()
+    report = {
+        "load_seconds": round(time.perf_counter() - start, 2),
+        "dtype": str(next(model.parameters()).dtype).replace("torch.", ""),
+        "checkpoint_dtype": stored,
+        "low_memory": config.low_memory,
+        "weights_mb": round(sum(p.numel() * p.element_size() for p in model.parameters()) / 2 ** 20, 1),
+        "rss_before_mb": rss_before,
+        "rss_after_mb": rss_mb(),
+        "private_rss_mb": rss_mb("RssAnon"),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    logger.info(f"Modelo {model_name} cargado en {report['load_seconds']}s ({report['dtype']}, "
+                f"{report['weights_mb']} MB de pesos; RSS {report['rss_before_mb']} -> {report['rss_after_mb']} MB, "
+                f"{report['private_rss_mb']} MB privados, pico {report['peak_rss_mb']} MB)")
+    return model, report
+
+
+def dtype_agreement(model_name: str, config: ModelLoadConfig, texts: List[str], batch_size: int = 16) -> Dict:
+    """Compara P(masculino) del modelo cargado con `config` frente al mismo modelo en float32."""
+    from gender_bias_analyzer import prepare_model_text
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    probs = {}
+    for name, cfg in (("float32", ModelLoadConfig("float32", config.low_memory)), (config.dtype, config)):
+        model, _ = load_sequence_classifier(model_name, cfg, num_labels=2)
+        values = []
+        for i in range(0, len(texts), batch_size):
+            enc = tokenizer([prepare_model_text(t) for t in texts[i:i + batch_size]], padding=True,
+                            truncation=True, max_length=512, return_tensors="pt")
+            with torch.no_grad():
+                values.append(torch.softmax(model(**enc).logits.float(), dim=-1)[:, 0])
+        probs[name] = torch.cat(values)
+        del model
+    reference, other = probs["float32"], probs[config.dtype]
+    diff = (reference - other).abs()
+    return {
+        "texts": len(texts),
+        "dtype": config.dtype,
+        "max_abs_diff": round(float(diff.max()), 6),
+        "mean_abs_diff": round(float(diff.mean()), 6),
+        "label_agreement": round(float(((reference > 0.5) == (other > 0.5)).float().mean()), 4),
+    }
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Mide la carga del modelo contextual o lo exporta a safetensors")
+    parser.add_argument("--model", default=os.getenv("ROBERTA_MODEL", "PlanTL-GOB-ES/roberta-base-bne"))
+    parser.add_argument("--dtype", choices=tuple(DTYPES), default="float32")
+    parser.add_argument("--no-low-memory", action="store_true", help="Carga clásica")
+    parser.add_argument("--export", metavar="DIR", help="Guardar modelo y tokenizador como safetensors en DIR")
+    parser.add_argument("--agreement", metavar="CORPUS",
+                        help="Comparar las probabilidades en --dtype con las de float32 sobre un corpus CSV")
+    args = parser.parse_args()
+
+    config = ModelLoadConfig(dtype=args.dtype, low_memory=not args.no_low_memory)
+    if args.agreement:
+        from compare_lemmatizers import load_corpus
+        print(json.dumps(dtype_agreement(args.model, config, load_corpus(args.agreement))))
+        return
+    model, report = load_sequence_classifier(args.model, config, num_labels=2)
+    print(json.dumps(report))
+    if args.export:
+        model.save_pretrained(args.export, safe_serialization=True)
+        AutoTokenizer.from_pretrained(args.model).save_pretrained(args.export)
+        logger.info(f"Modelo exportado a {args.export}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detección de ofertas casi duplicadas (reposts con cambios mínimos) mediante
+MinHash y LSH, para reutilizar las puntuaciones de la oferta canónica en
+lugar de volver a pasar cada copia por spaCy y el modelo contextual.
+
+El índice se construye de forma incremental mientras se puntúan las ofertas:
+la primera oferta de cada grupo se analiza y queda como canónica; las
+siguientes cuya similitud de Jaccard estimada supere el umbral copian su
+resultado y registran el enlace (duplicate_of). El índice puede guardarse en
+disco para reconocer, en la siguiente ejecución, reposts de ofertas ya
+puntuadas.
+"""
+
+import pickle
+import re
+import threading
+import zlib
+from collections import defaultdict
+from dataclasses import replace
+from datetime import datetime
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from gender_bias_analyzer import BiasResult, offer_text
+from lexicon_compiler import normalize
+
+import logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 0.9
+DEFAULT_NUM_PERM = 128
+DEFAULT_SHINGLE_SIZE = 3
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_WORD_RE = re.compile(r"\w+")
+_INDEX_VERSION = 1
+
+
+def shingles(text: str, size: int = DEFAULT_SHINGLE_SIZE) -> List[str]:
+    """Secuencias de `size` palabras consecutivas del texto normalizado."""
+    words = _WORD_RE.findall(normalize(text))
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+def lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Elige bandas × filas (con bandas·filas = num_perm) cuyo umbral de
+    colisión (1/bandas)^(1/filas) queda justo por debajo de `threshold`:
+    se prefiere recuperar de más y descartar después con la similitud estimada.
+    """
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    below = [(b, r) for b, r in options if (1 / b) ** (1 / r) <= threshold]
+    return max(below or options[:1], key=lambda br: (1 / br[0]) ** (1 / br[1]))
+
+
+class NearDuplicateIndex:
+    """Índice MinHash/LSH en memoria: firma por oferta canónica y cubetas por banda."""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, num_perm: int = DEFAULT_NUM_PERM,
+                 shingle_size: int = DEFAULT_SHINGLE_SIZE, seed: int = 1):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"threshold debe estar en (0, 1], no {threshold!r}")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        # Permutaciones aleatorias h(x) = (a·x + b) mod p, con x un hash de 32 bits
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._buckets: List[Dict[bytes, List[Hashable]]] = [defaultdict(list) for _ in range(self.bands)]
+        self.signatures: Dict[Hashable, np.ndarray] = {}
+        self.payloads: Dict[Hashable, object] = {}
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """Firma MinHash del texto (None si no tiene palabras)."""
+        grams = shingles(text, self.shingle_size)
+        if not grams:
+            return None
+        hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+        return permuted.min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def query(self, signature: np.ndarray) -> Optional[Tuple[Hashable, float]]:
+        """Oferta canónica más parecida con similitud >= threshold, y esa similitud."""
+        candidates = {key for band, bkey in zip(self._buckets, self._band_keys(signature)) for key in band.get(bkey, ())}
+        best = None
+        for key in candidates:
+            similarity = float(np.mean(self.signatures[key] == signature))
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (key, similarity)
+        return best
+
+    def add(self, key: Hashable, signature: np.ndarray, payload: object = None):
+        """Registra una oferta canónica (payload: su resultado, si ya se conoce)."""
+        self.signatures[key] = signature
+        if payload is not None:
+            self.payloads[key] = payload
+        for band, bkey in zip(self._buckets, self._band_keys(signature)):
+            band[bkey].append(key)
+
+    def save(self, path: str):
+        """Guarda el índice; solo se conservan las canónicas cuyo resultado se conoce."""
+        known = self.payloads.keys()
+        state = dict(
+            vars(self),
+            signatures={k: v for k, v in self.signatures.items() if k in known},
+            _buckets=[{bkey: [k for k in keys if k in known] for bkey, keys in band.items()} for band in self._buckets],
+            version=_INDEX_VERSION,
+        )
+        with open(path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        logger.info(f"Indice de casi duplicados guardado en {path} ({len(self)} ofertas canonicas)")
+
+    @classmethod
+    def load(cls, path: str) -> "NearDuplicateIndex":
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state.pop("version", None) != _INDEX_VERSION:
+            raise ValueError(f"{path} no es un indice de casi duplicados compatible")
+        index = cls.__new__(cls)
+        vars(index).update(state)
+        index._buckets = [defaultdict(list, b) for b in state["_buckets"]]
+        logger.info(f"Indice de casi duplicados cargado desde {path} ({len(index)} ofertas canonicas)")
+        return index
+
+
+class Deduplicator:
+    """
+    Separa los lotes de ofertas en canónicas (a analizar) y casi duplicadas
+    (que reutilizan el resultado de su canónica).
+
+    filter() se llama al preparar cada lote y resolve() con los resultados de
+    cada lote analizado; los duplicados cuya canónica aún está en proceso se
+    devuelven en el resolve() en que llega su resultado. Es seguro llamar a
+    ambos desde hilos distintos (multiprocessing.Pool consume los lotes en
+    un hilo propio).
+    """
+
+    def __init__(self, index: NearDuplicateIndex):
+        self.index = index
+        self.duplicates = 0
+        self._ready: List[Tuple[Dict, Hashable, float]] = []
+        self._waiting: Dict[Hashable, List[Tuple[Dict, float]]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def filter(self, records: List[Dict]) -> List[Dict]:
+        """Devuelve las ofertas del lote que deben analizarse."""
+        unique = []
+        for record in records:
+            signature = self.index.signature(offer_text(record["title"], record["description"]))
+            if signature is None:
+                unique.append(record)
+                continue
+            with self._lock:
+                match = self.index.query(signature)
+                if match is None:
+                    self.index.add(record["job_id"], signature)
+                    unique.append(record)
+                    continue
+                canonical, similarity = match
+                self.duplicates += 1
+                if canonical in self.index.payloads:
+                    self._ready.append((record, canonical, similarity))
+                else:
+                    self._waiting[canonical].append((record, similarity))
+        return unique
+
+    def resolve(self, results: List[BiasResult]) -> List[BiasResult]:
+        """Registra los resultados de canónicas y devuelve los duplicados ya resueltos."""
+        with self._lock:
+            for result in results:
+                if result.job_id in self.index.signatures:
+                    self.index.payloads[result.job_id] = result
+                    self._ready.extend((record, result.job_id, similarity)
+                                       for record, similarity in self._waiting.pop(result.job_id, ()))
+            ready, self._ready = self._ready, []
+
+        evaluated_at = datetime.now()
+        return [
+            replace(self.index.payloads[canonical], job_id=record["job_id"], evaluated_at=evaluated_at,
+                    duplicate_of=canonical, duplicate_similarity=round(similarity, 4))
+            for record, canonical, similarity in ready
+        ]
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Control de hilos y afinidad de CPU para torch, BLAS y spaCy dentro de cada worker.
+
+Con varios workers de gunicorn en un mismo host, cada proceso de PyTorch
+crea tantos hilos intra-op como núcleos tiene la máquina y la CPU queda
+sobresuscrita. Este módulo reparte los núcleos entre workers y, opcionalmente,
+elige el número de hilos midiendo la latencia del modelo con algunas formas
+de entrada.
+
+Variables de entorno (ver ThreadConfig.from_env):
+    WEB_CONCURRENCY          Workers por host (el mismo valor que usa gunicorn)
+    TORCH_INTRA_OP_THREADS   Hilos intra-op de torch, o "auto" para medirlos al arrancar
+    TORCH_INTER_OP_THREADS   Hilos inter-op de torch
+    BLAS_THREADS             Hilos de BLAS/OpenMP (numpy, spaCy/thinc)
+    CPU_AFFINITY             "true" para fijar cada worker a su bloque de núcleos
+"""
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def available_cores() -> List[int]:
+    """Núcleos en los que puede ejecutarse este proceso."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _int_env(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+@dataclass
+class ThreadConfig:
+    """Configuración de hilos de un worker; None significa "repartir los núcleos entre workers"."""
+    workers: int = 1
+    intra_op_threads: Optional[int] = None
+    inter_op_threads: Optional[int] = None
+    blas_threads: Optional[int] = None
+    autotune: bool = False
+    cpu_affinity: bool = False
+
+    @classmethod
+    def from_env(cls) -> "ThreadConfig":
+        """Lee la configuración de las variables de entorno del módulo."""
+        intra = os.getenv("TORCH_INTRA_OP_THREADS", "")
+        return cls(
+            workers=max(1, int(os.getenv("WEB_CONCURRENCY", 1))),
+            intra_op_threads=None if intra in ("", "auto") else int(intra),
+            inter_op_threads=_int_env("TORCH_INTER_OP_THREADS"),
+            blas_threads=_int_env("BLAS_THREADS"),
+            autotune=intra == "auto",
+            cpu_affinity=os.getenv("CPU_AFFINITY", "false").lower() in ("1", "true", "yes"),
+        )
+
+    def default_threads(self) -> int:
+        """Núcleos disponibles por worker."""
+        cores = available_cores()
+        # Si el worker ya está fijado a su bloque, todos sus núcleos son suyos
+        if self.cpu_affinity:
+            return max(1, len(cores))
+        return max(1, len(cores) // self.workers)
+
+
+def pin_worker(index: int, workers: int) -> List[int]:
+    """
+    Fija el proceso actual a un bloque contiguo de núcleos según su índice de worker.
+
+    Returns:
+        Núcleos asignados (lista vacía si el sistema no soporta afinidad)
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        logger.warning("Afinidad de CPU no soportada en este sistema")
+        return []
+    cores = available_cores()
+    workers = max(1, min(workers, len(cores)))
+    per_worker = len(cores) // workers
+    slot = index % workers
+    assigned = cores[slot * per_worker:(slot + 1) * per_worker]
+    os.sched_setaffinity(0, assigned)
+    logger.info(f"Worker {index} fijado a los nucleos {assigned}")
+    return assigned
+
+
+def apply_thread_config(config: ThreadConfig) -> Dict[str, int]:
+    """
+    Aplica la configuración de hilos a torch y a las bibliotecas BLAS/OpenMP.
+
+    Returns:
+        Valores efectivos de cada parámetro
+    """
+    import torch
+
+    intra = config.intra_op_threads or config.default_threads()
+    blas = config.blas_threads or intra
+    torch.set_num_threads(intra)
+
+    if config.inter_op_threads:
+        try:
+            torch.set_num_interop_threads(config.inter_op_threads)
+        except RuntimeError as e:
+            # Solo puede fijarse antes de que torch inicie trabajo paralelo
+            logger.warning(f"No se pudo fijar los hilos inter-op: {e}")
+
+    # Las variables de entorno afectan a bibliotecas que aún no se han cargado;
+    # threadpoolctl limita las que ya están cargadas (numpy, thinc)
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(blas)
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=blas)
+    except ImportError:
+        logger.info("threadpoolctl no instalado: BLAS limitado solo por variables de entorno")
+
+    settings = {
+        "intra_op_threads": torch.get_num_threads(),
+        "inter_op_threads": torch.get_num_interop_threads(),
+        "blas_threads": blas,
+        "cores": len(available_cores()),
+    }
+    logger.info(f"Hilos configurados: {settings}")
+    return settings
+
+
+def autotune_intra_op_threads(model, tokenizer, max_threads: int,
+                              lengths: Sequence[int] = (32, 128, 384), repeats: int = 3) -> int:
+    """
+    Elige el número de hilos intra-op que minimiza la latencia del modelo
+    para algunas longitudes de entrada representativas.
+
+    Returns:
+        Número de hilos elegido (ya aplicado con torch.set_num_threads)
+    """
+    import torch
+
+    candidates = sorted({n for n in (1, 2, 4, 8, 16, max_threads) if n <= max_threads})
+    inputs = [
+        tokenizer("oferta " * length, truncation=True, max_length=length, return_tensors="pt")
+        for length in lengths
+    ]
+
+    timings = {}
+    with torch.no_grad():
+        for threads in candidates:
+            torch.set_num_threads(threads)
+            model(**inputs[0])  # Calentamiento
+            start = time.perf_counter()
+            for _ in range(repeats):
+                for enc in inputs:
+                    model(**enc)
+            timings[threads] = time.perf_counter() - start
+
+    best = min(timings, key=timings.get)
+    torch.set_num_threads(best)
+    logger.info("Autotuning de hilos: " + ", ".join(
+        f"{n}={1000 * t / (repeats * len(inputs)):.1f}ms" for n, t in timings.items()
+    ) + f" -> {best}")
+    return best
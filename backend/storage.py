@@ -0,0 +1,661 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Almacenamiento de ofertas y resultados para el procesamiento por lotes.
+
+Todas las implementaciones exponen la misma interfaz, de modo que el mismo
+motor (AdvancedBiasAnalyzer.analyze_batch) puntúa ofertas de PostgreSQL o de
+archivos locales:
+
+    pending_jobs(batch_size) -> lotes de {"job_id", "title", "description"} aún sin puntuar
+    total_pending()          -> número de ofertas pendientes (o None si no se conoce)
+    save(results)            -> guarda una lista de BiasResult
+    close()
+
+PostgresStorage mantiene además tablas de agregados (agg_bias_daily,
+agg_detected_terms) que se actualizan en la misma transacción que cada
+guardado; el Dashboard las consulta en lugar de recorrer fact_bias_assessment.
+Crear o migrar el esquema (y el cálculo inicial de los agregados) solo lo
+hacen los procesos de puntuación (PostgresStorage(db_url)) o
+`score_offers.py --db URL --migrate-only`; el API abre la base con
+migrate=False y nunca ejecuta DDL.
+"""
+
+import csv
+import json
+import os
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Set
+
+from gender_bias_analyzer import BiasResult
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Columnas de fact_bias_assessment y su tipo (para crearlas si faltan)
+ASSESSMENT_COLUMNS = {
+    "job_id": "BIGINT PRIMARY KEY REFERENCES fact_job_post(job_id)",
+    "masc_hits": "INT",
+    "fem_hits": "INT",
+    "lex_score": "NUMERIC(5,4)",
+    "prob_m": "NUMERIC(6,5)",
+    "prob_f": "NUMERIC(6,5)",
+    "class_pred": "CHAR(1)",          # 'M' / 'F'
+    "model_ver": "TEXT",
+    "evaluated_at": "TIMESTAMPTZ",
+    "final_score": "NUMERIC(5,4)",
+    "method_used": "TEXT",
+    "is_tic": "BOOLEAN",
+    "detected_terms": "JSONB",
+    "duplicate_of": "BIGINT",
+    "duplicate_similarity": "NUMERIC(5,4)",
+}
+
+# Tablas de agregados: conteos por día/modelo/clase/TIC/tramo de score y por término detectado
+AGGREGATE_TABLES = {
+    "agg_bias_daily": """
+        day           DATE,
+        model_ver     TEXT,
+        class_pred    CHAR(1),
+        is_tic        BOOLEAN,
+        score_bucket  SMALLINT,
+        n             BIGINT,
+        score_sum     DOUBLE PRECISION,
+        PRIMARY KEY (day, model_ver, class_pred, is_tic, score_bucket)
+    """,
+    "agg_detected_terms": """
+        model_ver     TEXT,
+        category      TEXT,
+        term          TEXT,
+        n             BIGINT,
+        PRIMARY KEY (model_ver, category, term)
+    """,
+}
+SCORE_BUCKETS = 10  # Tramos de 0.1 en final_score
+TIME_GRANULARITIES = ("day", "week", "month")
+
+# Columnas de la salida en archivos
+FILE_RESULT_FIELDS = [
+    "lexical_score", "contextual_score", "final_prediction", "method_used", "confidence",
+    "masculine_hits", "feminine_hits", "prob_m", "prob_f", "is_tic",
+    "detected_masculine", "detected_feminine", "detected_neutral", "duplicate_of", "duplicate_similarity",
+    "model_ver", "evaluated_at",
+]
+# Tipo pyarrow de cada columna en la salida Parquet: todas las partes
+# comparten el esquema aunque en alguna una columna quede siempre vacía
+# (p. ej. duplicate_of sin casi duplicados), para poder leer el directorio junto
+PARQUET_RESULT_TYPES = {
+    "lexical_score": "float64", "contextual_score": "float64", "final_prediction": "float64",
+    "method_used": "string", "confidence": "float64", "masculine_hits": "int64", "feminine_hits": "int64",
+    "prob_m": "float64", "prob_f": "float64", "is_tic": "bool_", "detected_masculine": "string",
+    "detected_feminine": "string", "detected_neutral": "string", "duplicate_of": "string",
+    "duplicate_similarity": "float64", "model_ver": "string", "evaluated_at": "string",
+}
+
+
+def _batches(records: Iterator[Dict], size: int) -> Iterator[List[Dict]]:
+    while True:
+        batch = list(islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+
+class AggregateDelta:
+    """Cambios pendientes en las tablas de agregados (+1 por fila nueva, -1 por fila reemplazada)."""
+
+    def __init__(self):
+        self.bias: Dict[tuple, List[float]] = defaultdict(lambda: [0, 0.0])
+        self.terms: Counter = Counter()
+        self.has_removals = False
+
+    def add(self, row: Dict, sign: int = 1):
+        """Suma (o resta, con sign=-1) una fila de fact_bias_assessment."""
+        score = row.get("final_score")
+        if score is None:  # Filas anteriores a final_score: solo léxico
+            score = row.get("lex_score") or 0.0
+        score = float(score)
+        evaluated_at = row.get("evaluated_at")
+        if isinstance(evaluated_at, str):
+            evaluated_at = datetime.fromisoformat(evaluated_at)
+        model_ver = row.get("model_ver") or ""
+        key = (
+            evaluated_at.date() if evaluated_at else date(1970, 1, 1),
+            model_ver,
+            row.get("class_pred") or ("M" if score > 0.5 else "F"),
+            bool(row.get("is_tic")),
+            min(int(score * SCORE_BUCKETS), SCORE_BUCKETS - 1),
+        )
+        self.bias[key][0] += sign
+        self.bias[key][1] += sign * score
+
+        detected = row.get("detected_terms") or {}
+        if isinstance(detected, str):
+            detected = json.loads(detected)
+        for category, terms in detected.items():
+            for term in set(terms):
+                self.terms[(model_ver, category, term)] += sign
+        if sign < 0:
+            self.has_removals = True
+
+
+class PostgresStorage:
+    """Lee de fact_job_post y guarda en fact_bias_assessment (y sus agregados)."""
+
+    def __init__(self, db_url: str, migrate: bool = True):
+        """
+        Args:
+            migrate: Crear o completar las tablas (y calcular los agregados
+                si no existían). Con False solo se consulta: es el modo del API
+        """
+        from sqlalchemy import create_engine
+        self.engine = create_engine(db_url)
+        if migrate:
+            self._verify_table_structure()
+            self._verify_aggregate_tables()
+
+    def missing_aggregate_tables(self) -> List[str]:
+        """Tablas de agregados que aún no existen (sin crearlas)."""
+        from sqlalchemy import inspect
+        existing = set(inspect(self.engine).get_table_names())
+        return [name for name in AGGREGATE_TABLES if name not in existing]
+
+    def _verify_table_structure(self):
+        """Crea fact_bias_assessment o agrega las columnas que falten."""
+        from sqlalchemy import inspect, text
+
+        logger.info("Verificando estructura de la tabla fact_bias_assessment...")
+        inspector = inspect(self.engine)
+        with self.engine.begin() as conn:
+            if "fact_bias_assessment" not in inspector.get_table_names():
+                logger.warning("La tabla fact_bias_assessment no existe. Se creara automaticamente.")
+                columns = ",\n".join(f"{name} {ddl}" for name, ddl in ASSESSMENT_COLUMNS.items())
+                conn.execute(text(f"CREATE TABLE fact_bias_assessment (\n{columns}\n)"))
+                logger.info("Tabla fact_bias_assessment creada exitosamente")
+                return
+
+            existing = {col["name"].lower() for col in inspector.get_columns("fact_bias_assessment")}
+            missing = [name for name in ASSESSMENT_COLUMNS if name not in existing]
+            for name in missing:
+                conn.execute(text(f"ALTER TABLE fact_bias_assessment ADD COLUMN {name} {ASSESSMENT_COLUMNS[name]}"))
+                logger.info(f"Columna {name} agregada exitosamente")
+        logger.info("Estructura de tabla verificada correctamente")
+
+    def _verify_aggregate_tables(self):
+        """Crea las tablas de agregados que falten y, si hubo que crearlas, las calcula."""
+        from sqlalchemy import text
+
+        missing = self.missing_aggregate_tables()
+        if not missing:
+            return
+        with self.engine.begin() as conn:
+            for name in missing:
+                conn.execute(text(f"CREATE TABLE {name} ({AGGREGATE_TABLES[name]})"))
+                logger.info(f"Tabla {name} creada exitosamente")
+        self.rebuild_aggregates()
+
+    def rebuild_aggregates(self, page_size: int = 10000):
+        """Recalcula los agregados recorriendo toda fact_bias_assessment (una sola vez)."""
+        from sqlalchemy import text
+
+        query = text(
+            "SELECT job_id, evaluated_at, model_ver, class_pred, is_tic, final_score, lex_score, detected_terms "
+            "FROM fact_bias_assessment WHERE job_id > :last_id ORDER BY job_id LIMIT :limit"
+        )
+        delta, last_id, rows_seen = AggregateDelta(), -1, 0
+        with self.engine.connect() as conn:
+            while True:
+                rows = [dict(r) for r in conn.execute(query, {"last_id": last_id, "limit": page_size}).mappings()]
+                if not rows:
+                    break
+                for row in rows:
+                    delta.add(row)
+                last_id = rows[-1]["job_id"]
+                rows_seen += len(rows)
+        with self.engine.begin() as conn:
+            for name in AGGREGATE_TABLES:
+                conn.execute(text(f"DELETE FROM {name}"))
+            self._apply_delta(conn, delta)
+        logger.info(f"Agregados recalculados a partir de {rows_seen} evaluaciones")
+
+    @staticmethod
+    def _apply_delta(conn, delta: AggregateDelta):
+        from sqlalchemy import text
+
+        bias = [
+            {"day": day, "model_ver": model_ver, "class_pred": class_pred, "is_tic": is_tic,
+             "score_bucket": bucket, "n": n, "score_sum": score_sum}
+            for (day, model_ver, class_pred, is_tic, bucket), (n, score_sum) in delta.bias.items()
+            if n or score_sum
+        ]
+        if bias:
+            conn.execute(text(
+                "INSERT INTO agg_bias_daily (day, model_ver, class_pred, is_tic, score_bucket, n, score_sum) "
+                "VALUES (:day, :model_ver, :class_pred, :is_tic, :score_bucket, :n, :score_sum) "
+                "ON CONFLICT (day, model_ver, class_pred, is_tic, score_bucket) DO UPDATE SET "
+                "n = agg_bias_daily.n + EXCLUDED.n, score_sum = agg_bias_daily.score_sum + EXCLUDED.score_sum"
+            ), bias)
+        terms = [
+            {"model_ver": model_ver, "category": category, "term": term, "n": n}
+            for (model_ver, category, term), n in delta.terms.items()
+            if n
+        ]
+        if terms:
+            conn.execute(text(
+                "INSERT INTO agg_detected_terms (model_ver, category, term, n) "
+                "VALUES (:model_ver, :category, :term, :n) "
+                "ON CONFLICT (model_ver, category, term) DO UPDATE SET n = agg_detected_terms.n + EXCLUDED.n"
+            ), terms)
+        if delta.has_removals:
+            conn.execute(text("DELETE FROM agg_bias_daily WHERE n <= 0"))
+            conn.execute(text("DELETE FROM agg_detected_terms WHERE n <= 0"))
+
+    _PENDING_WHERE = "WHERE job_id NOT IN (SELECT job_id FROM fact_bias_assessment)"
+
+    def total_pending(self) -> Optional[int]:
+        from sqlalchemy import text
+        with self.engine.connect() as conn:
+            return conn.execute(text(f"SELECT COUNT(*) FROM fact_job_post {self._PENDING_WHERE}")).scalar()
+
+    def pending_jobs(self, batch_size: int) -> Iterator[List[Dict]]:
+        """
+        Ofertas aún no analizadas, por páginas ordenadas por job_id (sin
+        mantener abierta una transacción de lectura mientras se guardan resultados).
+        """
+        from sqlalchemy import text
+        query = text(
+            f"SELECT job_id, title, description FROM fact_job_post {self._PENDING_WHERE} "
+            "AND job_id > :last_id ORDER BY job_id LIMIT :limit"
+        )
+        last_id = -1
+        while True:
+            with self.engine.connect() as conn:
+                rows = [dict(r) for r in conn.execute(query, {"last_id": last_id, "limit": batch_size}).mappings()]
+            if not rows:
+                return
+            last_id = rows[-1]["job_id"]
+            yield rows
+
+    def save(self, results: List[BiasResult]):
+        """
+        Inserta o actualiza los resultados (upsert por job_id) y, en la misma
+        transacción, actualiza los agregados: resta las evaluaciones
+        reemplazadas y suma las nuevas.
+        """
+        from sqlalchemy import bindparam, text
+        if not results:
+            return
+        columns = list(ASSESSMENT_COLUMNS)
+        updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns if c != "job_id")
+        query = text(
+            f"INSERT INTO fact_bias_assessment ({', '.join(columns)}) "
+            f"VALUES ({', '.join(':' + c for c in columns)}) "
+            f"ON CONFLICT (job_id) DO UPDATE SET {updates}"
+        )
+        previous = text(
+            "SELECT evaluated_at, model_ver, class_pred, is_tic, final_score, lex_score, detected_terms "
+            "FROM fact_bias_assessment WHERE job_id IN :job_ids"
+            + (" FOR UPDATE" if self.engine.dialect.name == "postgresql" else "")
+        ).bindparams(bindparam("job_ids", expanding=True))
+
+        rows = [self._to_row(r) for r in results]
+        delta = AggregateDelta()
+        with self.engine.begin() as conn:
+            for old in conn.execute(previous, {"job_ids": [r["job_id"] for r in rows]}).mappings():
+                delta.add(dict(old), sign=-1)
+            for row in rows:
+                delta.add(row)
+            conn.execute(query, rows)
+            self._apply_delta(conn, delta)
+
+    @staticmethod
+    def _to_row(result: BiasResult) -> Dict:
+        return {
+            "job_id": result.job_id,
+            "masc_hits": result.masc_hits,
+            "fem_hits": result.fem_hits,
+            "lex_score": result.lex_score,
+            "prob_m": result.prob_M,  # Usar minúsculas para la BD
+            "prob_f": result.prob_F,
+            "class_pred": result.class_pred,
+            "model_ver": result.model_ver,
+            "evaluated_at": result.evaluated_at,
+            "final_score": result.final_score,
+            "method_used": result.method_used,
+            "is_tic": result.is_tic,
+            "detected_terms": json.dumps(result.detected_terms, ensure_ascii=False),
+            "duplicate_of": result.duplicate_of,
+            "duplicate_similarity": result.duplicate_similarity,
+        }
+
+    def get_statistics(self) -> List[Dict]:
+        """Estadísticas por versión de modelo."""
+        from sqlalchemy import text
+        query = text("""
+        SELECT
+            COUNT(*) as total_jobs,
+            AVG(lex_score) as avg_lex_score,
+            AVG(prob_m) as avg_prob_m,
+            AVG(prob_f) as avg_prob_f,
+            COUNT(CASE WHEN class_pred = 'M' THEN 1 END) as male_bias_count,
+            COUNT(CASE WHEN class_pred = 'F' THEN 1 END) as female_bias_count,
+            model_ver
+        FROM fact_bias_assessment
+        GROUP BY model_ver
+        """)
+        with self.engine.connect() as conn:
+            return [dict(r) for r in conn.execute(query).mappings()]
+
+    # --- Consultas para el Dashboard (solo leen las tablas de agregados) ---
+
+    @staticmethod
+    def _model_filter(model_ver: Optional[str]) -> str:
+        return "WHERE model_ver = :model_ver" if model_ver else ""
+
+    def summary(self, model_ver: Optional[str] = None) -> Dict:
+        """Total de evaluaciones, conteos M/F y desglose TIC / no TIC."""
+        from sqlalchemy import text
+        query = text(
+            "SELECT class_pred, is_tic, SUM(n) AS n, SUM(score_sum) AS score_sum "
+            f"FROM agg_bias_daily {self._model_filter(model_ver)} GROUP BY class_pred, is_tic"
+        )
+        groups = {key: {"total": 0, "M": 0, "F": 0, "score_sum": 0.0} for key in ("all", "tic", "non_tic")}
+        with self.engine.connect() as conn:
+            for row in conn.execute(query, {"model_ver": model_ver}).mappings():
+                for key in ("all", "tic" if row["is_tic"] else "non_tic"):
+                    groups[key]["total"] += int(row["n"])
+                    groups[key][row["class_pred"].strip()] += int(row["n"])
+                    groups[key]["score_sum"] += float(row["score_sum"])
+        for group in groups.values():
+            score_sum = group.pop("score_sum")
+            group["avg_score"] = round(score_sum / group["total"], 4) if group["total"] else None
+        summary = groups.pop("all")
+        summary["by_tic"] = groups
+        return summary
+
+    def score_distribution(self, model_ver: Optional[str] = None) -> List[Dict]:
+        """Histograma de final_score en tramos de 0.1, separado por TIC / no TIC."""
+        from sqlalchemy import text
+        query = text(
+            "SELECT score_bucket, is_tic, SUM(n) AS n "
+            f"FROM agg_bias_daily {self._model_filter(model_ver)} GROUP BY score_bucket, is_tic"
+        )
+        buckets = [
+            {"start": round(i / SCORE_BUCKETS, 2), "end": round((i + 1) / SCORE_BUCKETS, 2),
+             "total": 0, "tic": 0, "non_tic": 0}
+            for i in range(SCORE_BUCKETS)
+        ]
+        with self.engine.connect() as conn:
+            for row in conn.execute(query, {"model_ver": model_ver}).mappings():
+                bucket = buckets[row["score_bucket"]]
+                bucket["total"] += int(row["n"])
+                bucket["tic" if row["is_tic"] else "non_tic"] += int(row["n"])
+        return buckets
+
+    def top_terms(self, model_ver: Optional[str] = None, category: Optional[str] = None,
+                  limit: int = 20) -> List[Dict]:
+        """Términos detectados con más frecuencia (número de ofertas en que aparecen)."""
+        from sqlalchemy import text
+        conditions = [c for c, v in (("model_ver = :model_ver", model_ver), ("category = :category", category)) if v]
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = text(
+            f"SELECT term, category, SUM(n) AS n FROM agg_detected_terms {where} "
+            "GROUP BY term, category ORDER BY n DESC, term LIMIT :limit"
+        )
+        with self.engine.connect() as conn:
+            rows = conn.execute(query, {"model_ver": model_ver, "category": category, "limit": limit}).mappings()
+            return [{"term": r["term"], "category": r["category"], "count": int(r["n"])} for r in rows]
+
+    def time_series(self, model_ver: Optional[str] = None, granularity: str = "day",
+                    days: Optional[int] = None) -> List[Dict]:
+        """Evaluaciones por día, semana o mes de evaluated_at (conteos M/F/TIC y score medio)."""
+        from sqlalchemy import text
+        if granularity not in TIME_GRANULARITIES:
+            raise ValueError(f"granularity debe ser uno de {TIME_GRANULARITIES}, no {granularity!r}")
+        conditions = ["model_ver = :model_ver"] if model_ver else []
+        since = None
+        if days:
+            conditions.append("day >= :since")
+            since = date.today() - timedelta(days=days)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = text(
+            "SELECT day, class_pred, is_tic, SUM(n) AS n, SUM(score_sum) AS score_sum "
+            f"FROM agg_bias_daily {where} GROUP BY day, class_pred, is_tic ORDER BY day"
+        )
+        periods: Dict[date, Dict] = {}
+        with self.engine.connect() as conn:
+            for row in conn.execute(query, {"model_ver": model_ver, "since": since}).mappings():
+                day = row["day"] if isinstance(row["day"], date) else date.fromisoformat(row["day"])
+                if granularity == "week":
+                    day -= timedelta(days=day.weekday())
+                elif granularity == "month":
+                    day = day.replace(day=1)
+                period = periods.setdefault(day, {"period": day.isoformat(), "total": 0, "M": 0, "F": 0,
+                                                  "tic": 0, "score_sum": 0.0})
+                n = int(row["n"])
+                period["total"] += n
+                period[row["class_pred"].strip()] += n
+                period["tic"] += n if row["is_tic"] else 0
+                period["score_sum"] += float(row["score_sum"])
+        series = []
+        for day in sorted(periods):
+            period = periods[day]
+            period["avg_score"] = round(period.pop("score_sum") / period["total"], 4)
+            series.append(period)
+        return series
+
+    def close(self):
+        self.engine.dispose()
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError:
+        raise SystemExit("Los archivos Parquet requieren pyarrow: pip install pyarrow")
+
+
+def iter_records(path: str) -> Iterator[Dict]:
+    """Lee las ofertas de un CSV, JSONL o Parquet registro a registro."""
+    if path.endswith(".csv"):
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            yield from csv.DictReader(f)
+    elif path.endswith((".jsonl", ".ndjson")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif path.endswith(".parquet"):
+        pa = _require_pyarrow()
+        for batch in pa.parquet.ParquetFile(path).iter_batches(batch_size=1024):
+            yield from batch.to_pylist()
+    else:
+        raise SystemExit(f"Formato de entrada no soportado: {path} (use .csv, .jsonl o .parquet)")
+
+
+def count_records(path: str) -> Optional[int]:
+    """Cuenta las ofertas de la entrada de forma barata, para mostrar el progreso."""
+    if path.endswith(".parquet"):
+        return _require_pyarrow().parquet.ParquetFile(path).metadata.num_rows
+    if path.endswith(".csv"):
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            return sum(1 for _ in csv.reader(f)) - 1
+    with open(path, encoding="utf-8") as f:
+        return sum(1 for line in f if line.strip())
+
+
+def _drop_partial_row(path: str) -> int:
+    """
+    Si el archivo no termina en salto de línea (proceso interrumpido a mitad
+    de una fila), lo recorta hasta el último salto; así la siguiente fila
+    añadida no se pega a la incompleta. Devuelve los bytes descartados.
+    """
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            step = min(4096, pos)
+            f.seek(pos - step)
+            chunk = f.read(step)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                pos = pos - step + newline + 1
+                break
+            pos -= step
+        if pos < end:
+            f.truncate(pos)
+        return end - pos
+
+
+class FileStorage:
+    """
+    Lee ofertas de CSV/JSONL/Parquet y escribe resultados en CSV (append) o en
+    un directorio Parquet (un archivo por bloque). Las ofertas ya presentes en
+    la salida se omiten, lo que permite reanudar un proceso interrumpido.
+    """
+
+    def __init__(self, input_path: str, output_path: str, id_column: str = "job_id",
+                 text_column: str = "description", title_column: Optional[str] = "title",
+                 part_rows: int = 10000):
+        self.input_path = input_path
+        self.path = output_path
+        self.id_column = id_column
+        self.text_column = text_column
+        self.title_column = title_column
+        self.part_rows = part_rows
+        self.fieldnames = [id_column] + FILE_RESULT_FIELDS
+        self.is_parquet = output_path.endswith(".parquet")
+        self._buffer: List[Dict] = []
+        self._schema = None
+        if self.is_parquet:
+            _require_pyarrow()
+            os.makedirs(output_path, exist_ok=True)
+            self._part = len(self._parts())
+        else:
+            if os.path.exists(output_path):
+                dropped = _drop_partial_row(output_path)
+                if dropped:
+                    logger.warning(f"Descartados {dropped} bytes de una fila incompleta al final de {output_path}")
+            new_file = not os.path.exists(output_path) or os.path.getsize(output_path) == 0
+            if not new_file:
+                with open(output_path, encoding="utf-8", newline="") as f:
+                    header = next(csv.reader(f), [])
+                if header != self.fieldnames:
+                    raise SystemExit(f"{output_path} tiene otras columnas (de una version anterior): use otra salida")
+            self._file = open(output_path, "a", encoding="utf-8", newline="")
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+            if new_file:
+                self._writer.writeheader()
+        self.done = self._done_ids()
+        if self.done:
+            logger.info(f"Reanudando: {len(self.done)} ofertas ya puntuadas en {output_path}")
+
+    def _parts(self) -> List[str]:
+        return sorted(f for f in os.listdir(self.path) if f.startswith("part-") and f.endswith(".parquet"))
+
+    def _done_ids(self) -> Set[str]:
+        """Ids ya presentes en la salida (para reanudar)."""
+        if self.is_parquet:
+            pq = _require_pyarrow().parquet
+            return {
+                str(v) for part in self._parts()
+                for v in pq.read_table(os.path.join(self.path, part), columns=[self.id_column]).column(0).to_pylist()
+            }
+        with open(self.path, encoding="utf-8", newline="") as f:
+            # Por si acaso, una fila sin todas sus columnas tampoco cuenta como puntuada
+            return {row[self.id_column] for row in csv.DictReader(f) if row.get(self.fieldnames[-1]) is not None}
+
+    def total_pending(self) -> Optional[int]:
+        return count_records(self.input_path) - len(self.done)
+
+    def pending_jobs(self, batch_size: int) -> Iterator[List[Dict]]:
+        records = (
+            {
+                "job_id": r[self.id_column],
+                "title": r.get(self.title_column) if self.title_column else None,
+                "description": r.get(self.text_column) or "",
+            }
+            for r in iter_records(self.input_path)
+            if str(r[self.id_column]) not in self.done
+        )
+        return _batches(records, batch_size)
+
+    def _to_row(self, result: BiasResult) -> Dict:
+        return {
+            self.id_column: result.job_id,
+            "lexical_score": result.lex_score,
+            "contextual_score": result.contextual_score,
+            "final_prediction": result.final_score,
+            "method_used": result.method_used,
+            "confidence": result.confidence,
+            "masculine_hits": result.masc_hits,
+            "feminine_hits": result.fem_hits,
+            "prob_m": result.prob_M,
+            "prob_f": result.prob_F,
+            "is_tic": result.is_tic,
+            "detected_masculine": ";".join(sorted(result.detected_terms["masculino"])),
+            "detected_feminine": ";".join(sorted(result.detected_terms["femenino"])),
+            "detected_neutral": ";".join(sorted(result.detected_terms["neutral"])),
+            "duplicate_of": None if result.duplicate_of is None else str(result.duplicate_of),
+            "duplicate_similarity": result.duplicate_similarity,
+            "model_ver": result.model_ver,
+            "evaluated_at": result.evaluated_at.isoformat(timespec="seconds"),
+        }
+
+    def save(self, results: List[BiasResult]):
+        rows = [self._to_row(r) for r in results]
+        if not self.is_parquet:
+            self._writer.writerows(rows)
+            self._file.flush()
+            return
+        self._buffer.extend(rows)
+        if len(self._buffer) >= self.part_rows:
+            self._flush_part()
+
+    def _id_type(self):
+        """Tipo de la columna de id: el de las partes ya escritas o, si no hay, el de la entrada."""
+        pa = _require_pyarrow()
+        parts = self._parts()
+        if parts:
+            return pa.parquet.read_schema(os.path.join(self.path, parts[0])).field(self.id_column).type
+        if self.input_path.endswith(".parquet"):
+            return pa.parquet.read_schema(self.input_path).field(self.id_column).type
+        if self.input_path.endswith(".csv"):
+            return pa.string()
+        # JSONL: enteros si lo son todos los ids del primer bloque
+        ids = [row[self.id_column] for row in self._buffer]
+        return pa.int64() if all(isinstance(v, int) and not isinstance(v, bool) for v in ids) else pa.string()
+
+    def _parquet_schema(self):
+        if self._schema is None:
+            pa = _require_pyarrow()
+            self._schema = pa.schema(
+                [pa.field(self.id_column, self._id_type())]
+                + [pa.field(name, getattr(pa, PARQUET_RESULT_TYPES[name])()) for name in FILE_RESULT_FIELDS]
+            )
+        return self._schema
+
+    def _flush_part(self):
+        if not self._buffer:
+            return
+        pa = _require_pyarrow()
+        schema = self._parquet_schema()
+        if pa.types.is_string(schema.field(self.id_column).type):
+            for row in self._buffer:
+                row[self.id_column] = str(row[self.id_column])
+        name = os.path.join(self.path, f"part-{self._part:05d}.parquet")
+        # Escritura atómica: una parte a medias nunca se considera completa
+        pa.parquet.write_table(pa.Table.from_pylist(self._buffer, schema=schema), f"{name}.tmp")
+        os.replace(f"{name}.tmp", name)
+        self._part += 1
+        self._buffer = []
+
+    def close(self):
+        if self.is_parquet:
+            self._flush_part()
+        else:
+            self._file.close()
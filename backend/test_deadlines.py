@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la cola de inferencia de deadlines.py. Uso:
+
+    python test_deadlines.py      # o: python -m pytest test_deadlines.py
+"""
+
+import threading
+import time
+
+from deadlines import Deadline, InferenceGate
+
+
+def _wait_for(condition, timeout: float = 5.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "la condición no se cumplió a tiempo"
+        time.sleep(0.005)
+
+
+class _Holder:
+    """Ocupa un turno de la cola (en otro hilo) hasta llamar a release()."""
+
+    def __init__(self, gate: InferenceGate):
+        self._done = threading.Event()
+        self.started = threading.Event()
+        self.result = "sin ejecutar"
+
+        def fn():
+            self.started.set()
+            self._done.wait()
+            return "ok"
+
+        def target():
+            self.result = gate.run(fn)
+
+        self._thread = threading.Thread(target=target, daemon=True)
+        self._thread.start()
+
+    def release(self):
+        self._done.set()
+        self._thread.join(5)
+
+
+def test_rejects_when_queue_is_full():
+    gate = InferenceGate(max_concurrency=1, max_queue=1)
+    holder = _Holder(gate)
+    holder.started.wait(5)
+    waiter = _Holder(gate)  # Sin plazo: espera turno aunque la cola esté llena
+    _wait_for(lambda: gate.stats()["waiting"] == 1)
+
+    calls = []
+    start = time.monotonic()
+    assert gate.run(lambda: calls.append(1), deadline=Deadline(10000)) is None
+    assert time.monotonic() - start < 1, "con la cola llena se rechaza sin esperar"
+    assert calls == [] and gate.stats()["rejected"] == 1
+
+    holder.release()
+    waiter.started.wait(5)
+    waiter.release()
+    assert (holder.result, waiter.result) == ("ok", "ok")
+    assert gate.stats()["active"] == 0
+
+
+def test_rejects_when_deadline_expires_while_waiting():
+    gate = InferenceGate(max_concurrency=1, max_queue=8)
+    holder = _Holder(gate)
+    holder.started.wait(5)
+
+    start = time.monotonic()
+    calls = []
+    assert gate.run(lambda: calls.append(1), deadline=Deadline(100)) is None
+    assert 0.05 < time.monotonic() - start < 2
+    stats = gate.stats()
+    assert calls == [] and stats["rejected"] == 1 and stats["waiting"] == 0
+
+    # La espera abandonada no se queda con el turno que se libera
+    holder.release()
+    assert gate.run(lambda: "ok", deadline=Deadline(1000)) == "ok"
+    assert gate.stats()["active"] == 0
+
+
+def test_cancelled_request_stops_waiting():
+    gate = InferenceGate(max_concurrency=1, max_queue=8)
+    holder = _Holder(gate)
+    holder.started.wait(5)
+    deadline = Deadline()
+    threading.Timer(0.05, deadline.cancel).start()
+    assert gate.run(lambda: "no", deadline=deadline) is None
+    holder.release()
+    assert gate.stats()["waiting"] == 0
+
+
+def test_turn_arriving_as_slack_runs_out_is_passed_on():
+    """Si el turno llega justo cuando se agota el plazo, se cede a la siguiente espera."""
+    gate = InferenceGate(max_concurrency=1, max_queue=8)
+    holder = _Holder(gate)
+    holder.started.wait(5)
+
+    class RacingDeadline(Deadline):
+        calls = 0
+
+        def remaining(self):
+            self.calls += 1
+            if self.calls == 1:
+                return 10.0  # Admisión en la cola
+            # Mientras se calcula el margen, el turno pasa a esta espera
+            holder.release()
+            return 0.0
+
+    racing = RacingDeadline()
+    assert gate.run(lambda: "no", deadline=racing) is None
+    assert gate.stats()["active"] == 0 and gate.stats()["rejected"] == 1
+    assert gate.run(lambda: "ok", deadline=Deadline(1000)) == "ok"
+
+
+def test_waiters_are_served_in_arrival_order():
+    gate = InferenceGate(max_concurrency=1, max_queue=8)
+    holder = _Holder(gate)
+    holder.started.wait(5)
+    order = []
+    threads = []
+    for i in range(4):
+        threads.append(threading.Thread(target=gate.run, args=(lambda i=i: order.append(i),)))
+        threads[-1].start()
+        _wait_for(lambda: gate.stats()["waiting"] == i + 1)
+    holder.release()
+    for thread in threads:
+        thread.join(5)
+    assert order == [0, 1, 2, 3]
+
+
+def test_exclusive_call_runs_alone_and_keeps_fifo_order():
+    gate = InferenceGate(max_concurrency=2, max_queue=8)
+    running, peak, order = [], [], []
+    lock = threading.Lock()
+
+    def work(name):
+        with lock:
+            running.append(name)
+            peak.append(list(running))
+        time.sleep(0.05)
+        with lock:
+            running.remove(name)
+            order.append(name)
+
+    holder = _Holder(gate)
+    holder.started.wait(5)
+    exclusive = threading.Thread(target=gate.run, args=(lambda: work("exclusiva"),), kwargs={"exclusive": True})
+    exclusive.start()
+    _wait_for(lambda: gate.stats()["waiting"] == 1)
+    # Hay un turno libre, pero la exclusiva llegó antes y espera los dos
+    plain = threading.Thread(target=gate.run, args=(lambda: work("normal"),))
+    plain.start()
+    _wait_for(lambda: gate.stats()["waiting"] == 2)
+    assert gate.stats()["active"] == 1
+
+    holder.release()
+    exclusive.join(5)
+    plain.join(5)
+    assert order == ["exclusiva", "normal"]
+    assert ["exclusiva"] in peak and not any(len(names) > 1 and "exclusiva" in names for names in peak)
+    assert gate.stats()["active"] == 0
+
+
+def test_exclusive_calls_have_their_own_estimate():
+    gate = InferenceGate(max_concurrency=1, max_queue=8)
+    gate.run(lambda: time.sleep(0.01))
+    gate.run(lambda: time.sleep(0.2), exclusive=True)
+    assert gate.estimate(1) < 0.1 <= gate.estimate(1, exclusive=True)
+    # Una predicción cabe en un plazo corto aunque las explicaciones sean lentas
+    assert gate.run(lambda: "ok", deadline=Deadline(100)) == "ok"
+    assert gate.run(lambda: "no", deadline=Deadline(100), exclusive=True) is None
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("OK")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas de near_duplicates.py. Uso:
+
+    python test_near_duplicates.py      # o: python -m pytest test_near_duplicates.py
+"""
+
+import os
+import queue
+import tempfile
+import threading
+from datetime import datetime
+
+from gender_bias_analyzer import BiasResult
+from near_duplicates import Deduplicator, NearDuplicateIndex
+
+# Ofertas largas y distintas entre sí; un repost cambia una sola palabra
+_BASES = {
+    name: " ".join(f"{name}{i}" for i in range(120))
+    for name in ("desarrollo", "enfermeria", "contabilidad", "logistica")
+}
+
+
+def _offer(job_id, base: str, repost: bool = False) -> dict:
+    description = _BASES[base]
+    if repost:
+        description = description.replace(f"{base}60", "urgente")
+    return {"job_id": job_id, "title": "Oferta", "description": description}
+
+
+def _result(job_id, score: float = 0.7) -> BiasResult:
+    return BiasResult(
+        masc_hits=2, fem_hits=0, lex_score=score, prob_M=0.6, prob_F=0.4, class_pred="M",
+        model_ver="v2.0_ensemble", evaluated_at=datetime(2024, 1, 1),
+        detected_terms={"masculino": ["lider"], "femenino": [], "neutral": []},
+        job_id=job_id, final_score=score, method_used="ensemble",
+    )
+
+
+def test_duplicates_wait_for_their_canonical():
+    dedupe = Deduplicator(NearDuplicateIndex(threshold=0.8))
+    # El repost llega en el mismo lote que su canónica y en el siguiente
+    assert [r["job_id"] for r in dedupe.filter([_offer(1, "desarrollo"), _offer(2, "enfermeria"),
+                                                _offer(3, "desarrollo", repost=True)])] == [1, 2]
+    assert dedupe.filter([_offer(4, "desarrollo", repost=True)]) == []
+    assert dedupe.duplicates == 2
+
+    # Mientras la canónica está en proceso no se emite nada
+    assert dedupe.resolve([_result(2)]) == []
+    resolved = dedupe.resolve([_result(1, score=0.81)])
+    assert sorted(r.job_id for r in resolved) == [3, 4]
+    for result in resolved:
+        assert result.duplicate_of == 1 and result.duplicate_similarity >= 0.8
+        assert result.final_score == 0.81 and result.method_used == "ensemble"
+
+    # Con la canónica conocida, el duplicado se emite en el siguiente resolve
+    assert dedupe.filter([_offer(5, "desarrollo", repost=True)]) == []
+    assert [r.job_id for r in dedupe.resolve([])] == [5]
+    assert dedupe.resolve([]) == []
+
+
+def test_filter_and_resolve_on_separate_threads():
+    """Como con multiprocessing.Pool: un hilo prepara lotes y otro resuelve resultados."""
+    dedupe = Deduplicator(NearDuplicateIndex(threshold=0.8))
+    bases = list(_BASES)
+    batches = [
+        [_offer(100 * b + i, bases[(b + i) % len(bases)], repost=b > 0 or i > 0) for i in range(3)]
+        for b in range(30)
+    ]
+    pending = queue.Queue()
+
+    def producer():
+        for batch in batches:
+            pending.put(dedupe.filter(batch))
+        pending.put(None)
+
+    thread = threading.Thread(target=producer)
+    thread.start()
+    emitted = []
+    while True:
+        unique = pending.get()
+        if unique is None:
+            break
+        results = [_result(r["job_id"]) for r in unique]
+        emitted += results + dedupe.resolve(results)
+    emitted += dedupe.resolve([])
+    thread.join()
+
+    ids = [r.job_id for r in emitted]
+    assert sorted(ids) == sorted(r["job_id"] for batch in batches for r in batch)
+    canonicals = {r.job_id for r in emitted if r.duplicate_of is None}
+    assert len(canonicals) == len(bases)
+    assert all(r.duplicate_of in canonicals for r in emitted if r.duplicate_of is not None)
+    assert dedupe.duplicates == len(ids) - len(bases)
+
+
+def test_index_save_and_load_round_trip():
+    index = NearDuplicateIndex(threshold=0.8)
+    dedupe = Deduplicator(index)
+    dedupe.filter([_offer(1, "desarrollo"), _offer(2, "enfermeria")])
+    dedupe.resolve([_result(1)])  # La oferta 2 queda en proceso: no se guarda
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "dedupe_index.pkl")
+        index.save(path)
+        loaded = NearDuplicateIndex.load(path)
+
+    assert (loaded.threshold, loaded.bands, loaded.rows) == (index.threshold, index.bands, index.rows)
+    assert list(loaded.signatures) == [1] and list(loaded.payloads) == [1]
+    signature = loaded.signature(_offer(3, "desarrollo", repost=True)["description"])
+    assert (signature == index.signature(_offer(3, "desarrollo", repost=True)["description"])).all()
+    assert loaded.query(signature) == index.query(signature)
+
+    # En la siguiente ejecución los reposts de canónicas guardadas no se analizan
+    dedupe = Deduplicator(loaded)
+    assert dedupe.filter([_offer(3, "desarrollo", repost=True), _offer(4, "enfermeria", repost=True)]) == \
+        [_offer(4, "enfermeria", repost=True)]
+    resolved = dedupe.resolve([])
+    assert [(r.job_id, r.duplicate_of) for r in resolved] == [(3, 1)]
+
+
+if __name__ == "__main__":
+    test_duplicates_wait_for_their_canonical()
+    test_filter_and_resolve_on_separate_threads()
+    test_index_save_and_load_round_trip()
+    print("OK")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas de regresión de storage.py. Uso:
+
+    python test_storage.py      # o: python -m pytest test_storage.py
+"""
+
+import csv
+import json
+import os
+import tempfile
+from datetime import datetime
+
+import pytest
+
+from gender_bias_analyzer import BiasResult
+from storage import AGGREGATE_TABLES, FILE_RESULT_FIELDS, FileStorage, PostgresStorage
+
+
+def _result(job_id, duplicate_of=None) -> BiasResult:
+    return BiasResult(
+        masc_hits=1, fem_hits=0, lex_score=0.75, prob_M=0.6, prob_F=0.4, class_pred="M",
+        model_ver="v2.0_ensemble", evaluated_at=datetime(2024, 1, 1),
+        detected_terms={"masculino": ["lider"], "femenino": [], "neutral": []},
+        job_id=job_id, method_used="ensemble",
+        duplicate_of=duplicate_of, duplicate_similarity=None if duplicate_of is None else 0.95,
+    )
+
+
+def test_resume_after_truncated_row():
+    """Una fila cortada a mitad (proceso interrumpido) no debe mezclarse con la siguiente."""
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, "ofertas.csv")
+        output_path = os.path.join(tmp, "resultados.csv")
+        with open(input_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["job_id", "title", "description"])
+            writer.writerows([[i, "Oferta", f"Descripcion {i}"] for i in ("1", "2", "3")])
+
+        # Primera ejecución: se guarda la oferta 1 y la 2 queda a medio escribir
+        storage = FileStorage(input_path, output_path)
+        storage.save([_result("1")])
+        storage.close()
+        with open(output_path, "a", encoding="utf-8", newline="") as f:
+            f.write("2,0.5,0.5")
+
+        # Reanudación: la 2 se reprocesa y la 3 se puntúa por primera vez
+        storage = FileStorage(input_path, output_path)
+        assert storage.done == {"1"}
+        pending = [r["job_id"] for batch in storage.pending_jobs(10) for r in batch]
+        assert pending == ["2", "3"]
+        storage.save([_result(job_id) for job_id in pending])
+        storage.close()
+
+        with open(output_path, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert [r["job_id"] for r in rows] == ["1", "2", "3"]
+        assert all(r[field] not in (None, "") for r in rows for field in ("final_prediction", "evaluated_at"))
+        assert all(r["method_used"] == "ensemble" and r["prob_m"] == "0.6" for r in rows)
+        assert len(rows[0]) == len(FILE_RESULT_FIELDS) + 1
+
+
+def test_read_only_storage_does_not_migrate():
+    """Con migrate=False (el API) no se crea ninguna tabla; la migración explícita crea los agregados."""
+    from sqlalchemy import inspect
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = f"sqlite:///{os.path.join(tmp, 'tesis.db')}"
+        storage = PostgresStorage(db_url, migrate=False)
+        assert storage.missing_aggregate_tables() == list(AGGREGATE_TABLES)
+        assert inspect(storage.engine).get_table_names() == []
+        storage.close()
+
+        PostgresStorage(db_url).close()
+        storage = PostgresStorage(db_url, migrate=False)
+        assert storage.missing_aggregate_tables() == []
+        assert storage.summary()["total"] == 0
+        storage.close()
+
+
+def test_parquet_parts_share_schema():
+    """Partes con y sin casi duplicados deben poder leerse juntas, con ids de CSV (texto) o JSONL (enteros)."""
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    for fmt, ids in (("csv", ["1", "2", "3", "4"]), ("jsonl", [1, 2, 3, 4])):
+        with tempfile.TemporaryDirectory() as tmp:
+            input_path = os.path.join(tmp, f"ofertas.{fmt}")
+            with open(input_path, "w", encoding="utf-8", newline="") as f:
+                if fmt == "csv":
+                    f.write("job_id,title,description\n" + "".join(f"{i},Oferta,Texto\n" for i in ids))
+                else:
+                    f.writelines(json.dumps({"job_id": i, "title": "Oferta", "description": "Texto"}) + "\n"
+                                 for i in ids)
+            output_path = os.path.join(tmp, "resultados.parquet")
+
+            # Primera parte sin duplicados; la segunda (tras reanudar) con uno
+            storage = FileStorage(input_path, output_path, part_rows=2)
+            storage.save([_result(ids[0]), _result(ids[1])])
+            storage.close()
+            storage = FileStorage(input_path, output_path, part_rows=2)
+            assert storage.done == {"1", "2"}
+            storage.save([_result(ids[2], duplicate_of=ids[0]), _result(ids[3])])
+            storage.close()
+
+            table = pq.read_table(output_path)
+            assert sorted(os.listdir(output_path)) == ["part-00000.parquet", "part-00001.parquet"]
+            assert table.column("job_id").to_pylist() == ids
+            assert table.column("duplicate_of").to_pylist() == [None, None, "1", None]
+            assert table.column("duplicate_similarity").to_pylist() == [None, None, 0.95, None]
+
+
+if __name__ == "__main__":
+    test_resume_after_truncated_row()
+    test_read_only_storage_does_not_migrate()
+    test_parquet_parts_share_schema()
+    print("OK")
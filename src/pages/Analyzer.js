@@ -178,7 +178,11 @@ const Analyzer = () => {
                   {getBiasLevel(results.final_prediction).level} sesgo
                 </p>
                 <p className="text-sm text-gray-500 mt-1">
-                  Método usado: {results.method_used === 'ensemble' ? 'Ensemble (Lexical + RoBERTa)' : 'Solo Lexical'}
+                  Método usado: {results.method_used === 'ensemble'
+                    ? 'Ensemble (Lexical + RoBERTa)'
+                    : results.method_used === 'lexical_degraded'
+                      ? 'Solo Lexical (servicio con alta carga)'
+                      : 'Solo Lexical'}
                 </p>
               </div>
               <div className={`p-4 rounded-lg ${getBiasLevel(results.final_prediction).bg}`}>
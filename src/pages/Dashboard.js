@@ -10,6 +10,7 @@ const Dashboard = () => {
   const [lexiconStats, setLexiconStats] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const [analytics, setAnalytics] = useState(null);
 
   useEffect(() => {
     const fetchAnalyzerInfo = async () => {
@@ -29,9 +30,48 @@ const Dashboard = () => {
       }
     };
 
+    // La analítica depende de la base de datos: si no está disponible, se omite la sección
+    const fetchAnalytics = async () => {
+      try {
+        const [summary, distribution, terms, timeSeries] = await Promise.all([
+          apiService.getAnalyticsSummary(),
+          apiService.getScoreDistribution(),
+          apiService.getTopTerms({ limit: 15 }),
+          apiService.getTimeSeries({ granularity: 'month' })
+        ]);
+        setAnalytics({ summary, buckets: distribution.buckets, terms: terms.terms, series: timeSeries.series });
+      } catch (error) {
+        console.error('Error fetching analytics:', error);
+      }
+    };
+
     fetchAnalyzerInfo();
+    fetchAnalytics();
   }, []);
 
+  const percent = (value, total) => (total ? `${Math.round((100 * value) / total)}%` : '—');
+
+  // Barras horizontales simples (sin librería de gráficos)
+  const BarList = ({ items, color }) => {
+    const max = Math.max(1, ...items.map((item) => item.value));
+    return (
+      <div className="space-y-2">
+        {items.map((item) => (
+          <div key={item.label} className="flex items-center text-sm">
+            <span className="w-24 text-gray-600 shrink-0">{item.label}</span>
+            <div className="flex-1 bg-gray-100 rounded h-4 mx-2">
+              <div
+                className="h-4 rounded"
+                style={{ width: `${(100 * item.value) / max}%`, backgroundColor: color }}
+              />
+            </div>
+            <span className="w-12 text-right text-gray-800">{item.value}</span>
+          </div>
+        ))}
+      </div>
+    );
+  };
+
   // Componente de nube de palabras simple
   const WordCloud = ({ terms, title, color }) => {
     if (!terms || terms.length === 0) return null;
@@ -186,6 +226,70 @@ const Dashboard = () => {
         </div>
       )}
 
+      {/* Analítica de ofertas evaluadas (tablas de agregados del backend) */}
+      {analytics && analytics.summary.total > 0 && (
+        <div className="mb-8">
+          <h2 className="text-2xl font-bold text-center text-gray-900 mb-8">
+            Ofertas Evaluadas
+          </h2>
+
+          <div className="grid md:grid-cols-4 gap-6 mb-6">
+            <div className="bg-white rounded-lg shadow-lg p-6">
+              <p className="text-sm text-gray-600">Total Evaluadas</p>
+              <p className="text-2xl font-bold text-gray-900">{analytics.summary.total}</p>
+            </div>
+            <div className="bg-white rounded-lg shadow-lg p-6">
+              <p className="text-sm text-gray-600">Sesgo Masculino</p>
+              <p className="text-2xl font-bold text-blue-600">{analytics.summary.M}</p>
+              <p className="text-xs text-gray-500">{percent(analytics.summary.M, analytics.summary.total)}</p>
+            </div>
+            <div className="bg-white rounded-lg shadow-lg p-6">
+              <p className="text-sm text-gray-600">Sesgo Femenino</p>
+              <p className="text-2xl font-bold text-pink-600">{analytics.summary.F}</p>
+              <p className="text-xs text-gray-500">{percent(analytics.summary.F, analytics.summary.total)}</p>
+            </div>
+            <div className="bg-white rounded-lg shadow-lg p-6">
+              <p className="text-sm text-gray-600">Ofertas TIC</p>
+              <p className="text-2xl font-bold text-purple-600">{analytics.summary.by_tic.tic.total}</p>
+              <p className="text-xs text-gray-500">
+                {percent(analytics.summary.by_tic.tic.M, analytics.summary.by_tic.tic.total)} con sesgo masculino
+                (no TIC: {percent(analytics.summary.by_tic.non_tic.M, analytics.summary.by_tic.non_tic.total)})
+              </p>
+            </div>
+          </div>
+
+          <div className="grid md:grid-cols-3 gap-6">
+            <div className="bg-white rounded-lg shadow-lg p-6">
+              <h3 className="text-lg font-semibold text-gray-800 mb-4">Distribución del Score</h3>
+              <BarList
+                items={analytics.buckets.map((bucket) => ({
+                  label: `${bucket.start.toFixed(1)}–${bucket.end.toFixed(1)}`,
+                  value: bucket.total
+                }))}
+                color="#6366F1"
+              />
+            </div>
+            <div className="bg-white rounded-lg shadow-lg p-6">
+              <h3 className="text-lg font-semibold text-gray-800 mb-4">Términos más Detectados</h3>
+              <BarList
+                items={analytics.terms.map((term) => ({ label: term.term, value: term.count }))}
+                color="#F59E0B"
+              />
+            </div>
+            <div className="bg-white rounded-lg shadow-lg p-6">
+              <h3 className="text-lg font-semibold text-gray-800 mb-4">Evaluaciones por Mes</h3>
+              <BarList
+                items={analytics.series.slice(-12).map((period) => ({
+                  label: period.period.slice(0, 7),
+                  value: period.total
+                }))}
+                color="#10B981"
+              />
+            </div>
+          </div>
+        </div>
+      )}
+
       {/* Looker Studio Embed */}
       <div className="bg-white rounded-lg shadow-lg p-6 mb-8">
         <h2 className="text-xl font-bold text-gray-900 mb-4">
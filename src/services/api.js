@@ -21,9 +21,9 @@ apiClient.interceptors.response.use(
 
 // Servicios de la API
 export const apiService = {
-  // Analizar sesgo de género
-  analyzeGenderBias: async (description) => {
-    const response = await apiClient.post('/api/analyze', { description });
+  // Analizar sesgo de género (options: { explain, explain_method })
+  analyzeGenderBias: async (description, options = {}) => {
+    const response = await apiClient.post('/api/analyze', { description, ...options });
     return response.data;
   },
 
@@ -39,6 +39,30 @@ export const apiService = {
     return response.data;
   },
 
+  // Analítica de ofertas evaluadas (params: { model_ver })
+  getAnalyticsSummary: async (params = {}) => {
+    const response = await apiClient.get('/api/analytics/summary', { params });
+    return response.data;
+  },
+
+  // Distribución del score final en tramos de 0.1
+  getScoreDistribution: async (params = {}) => {
+    const response = await apiClient.get('/api/analytics/distribution', { params });
+    return response.data;
+  },
+
+  // Términos más detectados (params: { model_ver, category, limit })
+  getTopTerms: async (params = {}) => {
+    const response = await apiClient.get('/api/analytics/terms', { params });
+    return response.data;
+  },
+
+  // Serie temporal por evaluated_at (params: { model_ver, granularity, days })
+  getTimeSeries: async (params = {}) => {
+    const response = await apiClient.get('/api/analytics/timeseries', { params });
+    return response.data;
+  },
+
   // Verificar salud del servidor
   healthCheck: async () => {
     const response = await apiClient.get('/health');